@@ -1,7 +1,25 @@
+import os
+
 import dash
+import diskcache
 import dash_bootstrap_components as dbc
 
-app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Jobs of the background callbacks and their results are kept on disk and shared by all
+# workers. The results are cached until the data the callbacks read change.
+cache_dir = os.environ.get('DASH_CACHE_DIR', 'data/cache')
+background_data_dirs = ['nodal_lines/data']
+
+def background_data_version():
+    return sorted((path, os.stat(path).st_mtime_ns)
+                  for d in background_data_dirs
+                  for root, _, fnames in os.walk(d)
+                  for path in (os.path.join(root, f) for f in fnames))
+
+background_callback_manager = dash.DiskcacheManager(diskcache.Cache(cache_dir),
+                                                    cache_by=[background_data_version])
+
+app = dash.Dash(__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP],
+                background_callback_manager=background_callback_manager)
 server = app.server
 #mathjax = 'https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.4/MathJax.js?config=TeX-MML-AM_CHTML'
 #app.scripts.append_script({ 'external_url' : mathjax })
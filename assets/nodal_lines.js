@@ -0,0 +1,24 @@
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    nodal_lines: {
+        // Shows or hides the mirror planes (the surface traces) of a 3D figure in the browser.
+        // Only the small plane traces are copied, the volume data is passed on unchanged.
+        show_hide_planes: function(n_show, n_hide, figure) {
+            const ctx = window.dash_clientside.callback_context;
+            if (!figure || ctx.triggered.length === 0) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            // The ids of the buttons are dictionaries, serialized as json in front of '.n_clicks'
+            const prop_id = ctx.triggered[0].prop_id;
+            const button_id = JSON.parse(prop_id.slice(0, prop_id.lastIndexOf('.')));
+            const visible = button_id.type === 'nl-show-planes' ? true : 'legendonly';
+            const data = figure.data.map(function(trace) {
+                if (trace.type !== 'surface') {
+                    return trace;
+                }
+                return Object.assign({}, trace, {visible: visible});
+            });
+            const layout = Object.assign({uirevision: 'planes'}, figure.layout);
+            return Object.assign({}, figure, {data: data, layout: layout});
+        }
+    }
+});
@@ -0,0 +1,65 @@
+"""
+Times interpolate_to_new_grid, and iter_new_grid consuming the grid in chunks, against the old
+triple loop. Run from the repository root, e.g. python bench_interpolate.py > bench_output.txt
+"""
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from interpolate import interpolate_to_new_grid,iter_new_grid
+
+def interpolate_to_new_grid_loop(Xkd,nk):
+    """ The implementation before vectorization, kept as the baseline """
+    shape = Xkd.shape
+    xyz = tuple([np.linspace(0,1,shape[i],endpoint=False) for i in range(3)])
+    intp = RegularGridInterpolator(xyz,Xkd)
+    kpts = []
+    for i in range(nk):
+        for j in range(nk):
+            for k in range(nk):
+                kpts.append(np.array([float(i),float(j),float(k)])/nk)
+    return np.array(kpts),intp(kpts)
+
+def timed(f,*args):
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = f(*args)
+    elapsed = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result,elapsed,peak
+
+def consume_chunks(Xkd,nk,chunk_size):
+    total = 0.
+    for kpts,values in iter_new_grid(Xkd,nk,chunk_size):
+        total += values.sum()
+    return total
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark interpolate_to_new_grid against the old triple loop.')
+    parser.add_argument('--n', type=int, default=200, help='size of the source grid, the old loop needs nk <= n')
+    parser.add_argument('--nk', type=int, nargs='*', default=[30,60,200])
+    parser.add_argument('--chunk-size', type=int, default=400000)
+    parser.add_argument('--skip-loop', action='store_true', help='do not run the old loop')
+    args = parser.parse_args()
+
+    Xkd = np.random.default_rng(0).normal(size=(args.n,args.n,args.n))
+    print('source grid {}^3'.format(args.n))
+    print('{:>5} {:>12} {:>12} {:>12} {:>10} {:>12} {:>12} {:>12}'.format(
+        'nk','loop [s]','new [s]','chunked [s]','speedup','new [MB]','chunked [MB]','max diff'))
+    for nk in args.nk:
+        (kpts,values),t_new,m_new = timed(interpolate_to_new_grid,Xkd,nk)
+        _,t_chunk,m_chunk = timed(consume_chunks,Xkd,nk,args.chunk_size)
+        if args.skip_loop:
+            t_loop,diff = np.nan,np.nan
+        else:
+            t = time.perf_counter()
+            kpts_old,values_old = interpolate_to_new_grid_loop(Xkd,nk)
+            t_loop = time.perf_counter() - t
+            diff = np.abs(values_old - values).max()
+            del kpts_old,values_old
+        print('{:>5} {:>12.3f} {:>12.4f} {:>12.4f} {:>10.0f} {:>12.1f} {:>12.1f} {:>12.1e}'.format(
+            nk,t_loop,t_new,t_chunk,t_loop/t_new,m_new/1e6,m_chunk/1e6,diff))
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import argparse
+from os import path
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+database_json = 'data/paper_database.json'
+database_store = 'data/paper_database'
+
+# Heavy per-material columns, which are only read for the selected material
+detail_shapes = {'X': (2, 5, 3, 3)}
+
+def stack_column(values, shape):
+    stacked = np.full((len(values),) + shape, np.nan)
+    for i, value in enumerate(values):
+        if value is not None:
+            stacked[i] = value
+    return stacked
+
+def column_to_array(column):
+    if column.dtype.kind in 'biuf':
+        return 'array', column.to_numpy()
+    values = column.tolist()
+    if all(isinstance(v, str) for v in values):
+        return 'array', np.array(values, dtype=str)
+    return 'json', np.array([json.dumps(v) for v in values], dtype=str)
+
+def build_store(json_file=database_json, store_dir=database_store):
+    """ Convert the json database into .npy summary columns and contiguous .npy detail arrays """
+    df = pd.read_json(json_file)
+
+    tmp_dir = store_dir + '.tmp'
+    if path.isdir(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    manifest = {'n_materials': len(df), 'columns': {}, 'details': {}}
+    for i, name in enumerate(df.columns):
+        if name in detail_shapes:
+            fname = '{}.npy'.format(name)
+            np.save(path.join(tmp_dir, fname), stack_column(df[name], detail_shapes[name]))
+            manifest['details'][name] = fname
+            continue
+        kind, values = column_to_array(df[name])
+        fname = 'col{}.npy'.format(i)
+        np.save(path.join(tmp_dir, fname), values)
+        manifest['columns'][name] = [fname, kind]
+
+    with open(path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    if path.isdir(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+
+def read_manifest(store_dir):
+    with open(path.join(store_dir, 'manifest.json')) as f:
+        return json.load(f)
+
+def store_exists(store_dir):
+    return path.isfile(path.join(store_dir, 'manifest.json'))
+
+def load_summary(json_file=database_json, store_dir=database_store):
+    """
+    Return the table of scalar columns, read from the binary .npy columns if the store has been
+    built. pandas copies the columns into its own blocks, so each worker holds its own table,
+    the store only saves parsing the json.
+    """
+    if not store_exists(store_dir):
+        df = pd.read_json(json_file)
+        return df.drop(columns=[c for c in detail_shapes if c in df.columns])
+
+    columns = {}
+    for name, (fname, kind) in read_manifest(store_dir)['columns'].items():
+        values = np.load(path.join(store_dir, fname))
+        if kind == 'json':
+            values = pd.Series([json.loads(v) for v in values], dtype=object)
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+def read_npy_header(fname):
+    with open(fname, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order:
+            raise Exception('{} is not stored in C order'.format(fname))
+        return f.tell(), dtype, shape
+
+class DetailStore:
+    """
+    Per-material access to the heavy columns of the database.
+
+    With the store built only the row of the selected material is read from the .npy file and
+    the last cache_size rows are kept in memory. Without the store the columns are parsed from
+    the json and kept in memory.
+    """
+
+    def __init__(self, json_file=database_json, store_dir=database_store, cache_size=32):
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.files = {}
+        self.arrays = {}
+        if store_exists(store_dir):
+            for name, fname in read_manifest(store_dir)['details'].items():
+                fname = path.join(store_dir, fname)
+                self.files[name] = (fname,) + read_npy_header(fname)
+        else:
+            df = pd.read_json(json_file)
+            for name, shape in detail_shapes.items():
+                self.arrays[name] = stack_column(df[name], shape)
+
+    def read(self, name, i):
+        if name in self.arrays:
+            return self.arrays[name][i]
+        fname, offset, dtype, shape = self.files[name]
+        nbytes = dtype.itemsize * int(np.prod(shape[1:]))
+        with open(fname, 'rb') as f:
+            f.seek(offset + i * nbytes)
+            data = f.read(nbytes)
+        return np.frombuffer(data, dtype=dtype).reshape(shape[1:])
+
+    def get(self, name, i):
+        key = (name, i)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        value = self.read(name, i)
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return value
+
+class MaterialIndex:
+    """ Constant time lookup of the position of a material in the database by its MP id """
+
+    def __init__(self, ids, details):
+        self.positions = {idd: i for i, idd in enumerate(ids)}
+        self.details = details
+
+    def __contains__(self, idd):
+        return idd in self.positions
+
+    def position(self, idd):
+        return self.positions[idd]
+
+    def get_X(self, idd):
+        return self.details.get('X', self.positions[idd])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the columnar .npy store of the materials database.')
+    parser.add_argument('json_file', nargs='?', default=database_json)
+    parser.add_argument('store_dir', nargs='?', default=database_store)
+    args = parser.parse_args()
+    build_store(args.json_file, args.store_dir)
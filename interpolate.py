@@ -1,37 +1,208 @@
+import os
+
 import numpy as np
-from scipy.interpolate import RegularGridInterpolator
+import scipy.fft as sp_fft
 import plotly
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import json_tricks
 
-def interpolate_to_new_grid(Xkd,nk):
-    shape = Xkd.shape
-    xyz = tuple([np.linspace(0,1,shape[i],endpoint=False) for i in range(3)])
-    intp = RegularGridInterpolator(xyz,Xkd)
-    kpts = []
-    for i in range(nk):
-        for j in range(nk):
-            for k in range(nk):
-                kpts.append(np.array([float(i),float(j),float(k)])/nk)
-    return np.array(kpts),intp(kpts)
+from nodal_lines.data_bundle import load_volume,load_volume_levels,load_plane,load_bands
+
+# Largest number of grid points sent for a 3D volume plot, by default and in high resolution
+volume_points = int(os.environ.get('VOLUME_POINTS', 30000))
+volume_points_high = int(os.environ.get('VOLUME_POINTS_HIGH', 61**3))
+
+def interpolate_axis(Xkd,axis,ks):
+    """
+    Linear interpolation of a periodic grid along one axis at the fractional coordinates ks,
+    the grid points are at i/n for i in range(n) and the point 1 is the point 0.
+    """
+    n = Xkd.shape[axis]
+    x = np.asarray(ks)*n
+    i0 = np.floor(x)
+    w = x - i0
+    i0 = i0.astype(int) % n
+    i1 = (i0+1) % n
+    wshape = [1]*Xkd.ndim
+    wshape[axis] = len(w)
+    w = w.reshape(wshape)
+    return Xkd.take(i0,axis=axis)*(1-w) + Xkd.take(i1,axis=axis)*w
+
+def fourier_resample_axis(Xkd,n_new,axis,band_limit=None):
+    """
+    Resamples a real periodic grid to n_new points along one axis by zero-padding (or truncating)
+    its real FFT. With band_limit only the frequencies up to band_limit times the Nyquist
+    frequency of the original grid are kept.
+    """
+    n = Xkd.shape[axis]
+    F = sp_fft.rfft(Xkd,axis=axis)
+    m = min(n,n_new)//2 + 1
+    if band_limit is not None:
+        m = min(m,int(band_limit*(n//2))+1)
+    shape = list(F.shape)
+    shape[axis] = n_new//2 + 1
+    G = np.zeros(shape,dtype=F.dtype)
+    sl = [slice(None)]*F.ndim
+    sl[axis] = slice(0,m)
+    G[tuple(sl)] = F[tuple(sl)]
+    # The Nyquist component of an even grid is real and counted once. When upsampling it is
+    # split between +n/2 and -n/2, when downsampling to an even grid both halves meet in one.
+    if m == n//2 + 1 and n % 2 == 0 and n_new > n:
+        sl[axis] = n//2
+        G[tuple(sl)] /= 2
+    elif m == n_new//2 + 1 and n_new % 2 == 0 and n_new < n:
+        sl[axis] = n_new//2
+        G[tuple(sl)] = 2*G[tuple(sl)].real
+    return sp_fft.irfft(G,n=n_new,axis=axis)*(n_new/n)
+
+def grid_kpts(nk,start=0,stop=None):
+    """ The k-points i/nk,j/nk,k/nk of the new grid with start <= i < stop, the last index varying fastest """
+    if stop is None:
+        stop = nk
+    kpts = np.empty((stop-start,nk,nk,3))
+    kpts[...,0] = (np.arange(start,stop)/nk)[:,None,None]
+    kpts[...,1] = (np.arange(nk)/nk)[None,:,None]
+    kpts[...,2] = (np.arange(nk)/nk)[None,None,:]
+    return kpts.reshape(-1,3)
+
+def iter_new_grid(Xkd,nk,chunk_size=1000000,method='linear',band_limit=None):
+    """
+    Yields the k-points and values of interpolate_to_new_grid in chunks of at most chunk_size
+    points (or one plane of the grid if that is larger), in the same order.
+    """
+    ks = np.arange(nk)/nk
+    rows = max(chunk_size//(nk*nk),1)
+    if method == 'fourier':
+        # The first axis is resampled once on the small grid, each chunk is a slab of it
+        Xkd0 = fourier_resample_axis(Xkd,nk,0,band_limit)
+    elif method != 'linear':
+        raise Exception('Unknown interpolation method {}'.format(method))
+    for start in range(0,nk,rows):
+        stop = min(start+rows,nk)
+        if method == 'fourier':
+            values = fourier_resample_axis(Xkd0[start:stop],nk,1,band_limit)
+            values = fourier_resample_axis(values,nk,2,band_limit)
+        else:
+            values = interpolate_axis(Xkd,0,ks[start:stop])
+            values = interpolate_axis(values,1,ks)
+            values = interpolate_axis(values,2,ks)
+        yield grid_kpts(nk,start,stop),values.reshape(-1)
+
+def interpolate_to_new_grid(Xkd,nk,chunk_size=None,method='linear',band_limit=None):
+    """
+    Interpolation of Xkd, given on a regular grid of the unit cell without the endpoints, to a
+    grid of nk x nk x nk points. The grid is periodic, so points past the last grid point are
+    interpolated against the first one.
+
+    method='linear' interpolates linearly, method='fourier' zero-pads the FFT of Xkd, which keeps
+    sharp peaks and costs O(N log N); band_limit then drops the high frequencies (see
+    fourier_resample_axis). The interpolation is done one axis at a time on the whole grid. With
+    chunk_size the grid is processed in chunks of about chunk_size points, which bounds the
+    temporary memory. Returns the k-points (nk^3 x 3) and the values (nk^3).
+    """
+    if chunk_size is None:
+        chunk_size = nk**3
+    kpts = np.empty((nk**3,3))
+    values = np.empty(nk**3,dtype=np.result_type(Xkd,float))
+    pos = 0
+    for kpts_c,values_c in iter_new_grid(Xkd,nk,chunk_size,method,band_limit):
+        kpts[pos:pos+len(kpts_c)] = kpts_c
+        values[pos:pos+len(values_c)] = values_c
+        pos += len(values_c)
+    return kpts,values
+
+def iter_values(Xkd,chunk_size):
+    """ Yields the values of Xkd, which can be a memory map, in flat chunks of chunk_size """
+    flat = Xkd.reshape(-1)
+    for start in range(0,flat.size,chunk_size):
+        yield np.asarray(flat[start:start+chunk_size])
+
+def k_contribution(Xkd,tres=None,maxt=None,n_tres=200,chunk_size=None):
+    """
+    Fraction of the total sum of Xkd and fraction of the k-points that come from the points
+    with |Xkd| below each of the thresholds tres. By default there are n_tres thresholds log
+    spaced from 10 to maxt, the largest |Xkd|.
+
+    Without chunk_size the values are sorted once and the curves read off their cumulative
+    sum. With chunk_size Xkd is read in chunks, which are binned by the thresholds, so a
+    memory mapped grid is never loaded as a whole. Returns tres, sums and lengths.
+    """
+    if chunk_size is None:
+        values = np.asarray(Xkd).reshape(-1)
+        order = np.argsort(np.abs(values),kind='stable')
+        abs_sorted = np.abs(values[order])
+        if tres is None:
+            if maxt is None:
+                maxt = abs_sorted[-1]
+            tres = np.logspace(1,np.log10(maxt),n_tres)
+        cumsum = np.concatenate([[0],np.cumsum(values[order])])
+        below = np.searchsorted(abs_sorted,tres,side='left')
+        return tres,cumsum[below]/np.sum(values),below/len(values)
+
+    if tres is None:
+        if maxt is None:
+            maxt = max(np.max(np.abs(c)) for c in iter_values(Xkd,chunk_size))
+        tres = np.logspace(1,np.log10(maxt),n_tres)
+    # Bin i holds the points with tres[i-1] <= |Xkd| < tres[i]
+    counts = np.zeros(len(tres)+1)
+    sums = np.zeros(len(tres)+1)
+    for c in iter_values(Xkd,chunk_size):
+        b = np.searchsorted(tres,np.abs(c),side='right')
+        counts += np.bincount(b,minlength=len(tres)+1)
+        sums += np.bincount(b,weights=c,minlength=len(tres)+1)
+    return tres,np.cumsum(sums)[:-1]/np.sum(sums),np.cumsum(counts)[:-1]/np.sum(counts)
+
+def plotly_k_contribution(tres,sums,lengths,title=None):
+    fig = go.Figure()
+    fig.add_scatter(x=tres,y=sums,mode='lines',name='fraction of the total')
+    fig.add_scatter(x=tres,y=lengths,mode='lines',name='fraction of the k-points')
+    fig.update_xaxes(type='log',title='threshold')
+    fig.update_layout(title=title)
+    return fig
 
-def create_3d_plot(fname,isomin=1e3,isomax=1e4,surface_count=17):
+def crop_volume(axes,values,isomin):
+    """ Crop the volume to the bounding box of the points above isomin, with one point of margin """
+    above = values >= isomin
+    if not np.any(above):
+        return axes,values
+    slices = []
+    for i in range(3):
+        idx = np.flatnonzero(np.any(above,axis=tuple(j for j in range(3) if j != i)))
+        slices.append(slice(max(idx[0]-1,0),idx[-1]+2))
+    return [a[sl] for a,sl in zip(axes,slices)],values[tuple(slices)]
+
+def select_level(levels,isomin,max_points):
+    """ Returns the finest level of detail that has at most max_points points after cropping """
+    for axes,values in levels:
+        axes,values = crop_volume(axes,values,isomin)
+        if values.size <= max_points:
+            break
+    return axes,values
+
+def has_high_res(fname,isomin):
+    """ Whether the high resolution budget selects a finer level of the volume than the default one """
+    levels,ran = load_volume_levels(fname)
+    if levels is None:
+        return False
+    return select_level(levels,isomin,volume_points_high)[1].shape != select_level(levels,isomin,volume_points)[1].shape
+
+def create_3d_plot(fname,isomin=1e3,isomax=1e4,surface_count=17,max_points=None):
 
     #Xkd = np.load('Eu2SeO2.npy')
     #kpts,Xkdi = interpolate_to_new_grid(Xkd,30)
 
-    try:
-        with open(fname,'r') as f:
-            inp = json_tricks.load(f)
-            kpts = inp['kpts']
-            Xkdi = inp['Xkdi']
-            ran = inp['ran']
-    except:
-        with open(fname,'r') as f:
-            kpts,Xkdi = json_tricks.load(f)
-        ran = None
+    if max_points is None:
+        max_points = volume_points
+
+    levels,ran = load_volume_levels(fname)
+    if levels is None:
+        kpts,Xkdi,ran = load_volume(fname)
+        values = np.abs(Xkdi)
+    else:
+        axes,values = select_level(levels,isomin,max_points)
+        kpts = np.stack(np.meshgrid(*axes,indexing='ij'),axis=-1).reshape(-1,3)
+        values = values.ravel()
 
     #fig = go.Figure(layout={'height': 800, 'width': 800, 'title': 'Berry curvature distribution'})
     #layout = {'height': 800, 'width': 1000, 'title': 'Berry curvature distribution'}
@@ -41,7 +212,7 @@ def create_3d_plot(fname,isomin=1e3,isomax=1e4,surface_count=17):
         x=kpts[:,0],
         y=kpts[:,1],
         z=kpts[:,2],
-        value=np.abs(Xkdi),
+        value=values,
         isomin=isomin,
         isomax=isomax,
         opacity=0.1, # needs to be small to see through all surfaces
@@ -71,8 +242,7 @@ def create_3d_plot(fname,isomin=1e3,isomax=1e4,surface_count=17):
 def plotly_plane(fname,vmax=None,vmax_sf=1,bands=None,legend=True,width=3,
         legendonlybands=None,rescale_colors=True):
 
-    with open(fname) as f:
-        Xkd_p,crossing_ks_p = json_tricks.load(f)
+    Xkd_p,crossing_ks_p = load_plane(fname)
 
     if vmax is None:
         vmax = np.max(np.abs(Xkd_p))/vmax_sf
@@ -157,49 +327,70 @@ def add_plane(fig,a1,a2,shift=None,nps=5,color='#636EFA',opacity=0.5,name='',vis
 
     fig.update_traces(showlegend=True)
 
-def plot_bands(fname,title=None,ylim=None,kscale=None):
-    with open(fname) as f:
-        bands_data = json_tricks.load(f)
+def join_bands(x,E,decimals=None):
+    """ Join the bands E[:,b] into one line, with the bands separated by NaN """
+    if decimals is not None:
+        x = np.round(x,decimals)
+        E = np.round(E,decimals)
+    nk,nbands = E.shape
+    xs = np.empty((nbands,nk+1))
+    ys = np.empty((nbands,nk+1))
+    xs[:,:nk] = x
+    ys[:,:nk] = E.T
+    xs[:,nk] = np.nan
+    ys[:,nk] = np.nan
+    return xs.ravel(),ys.ravel()
+
+def plot_bands(fname,title=None,ylim=None,kscale=None,single_trace=True):
+    bands_data = load_bands(fname)
 
     fig = make_subplots(rows=2, cols=1, 
                     shared_xaxes=True, 
                     vertical_spacing=0.01)
 
 
-    nbands0 = bands_data['Eks0'].shape[1]
-    for b in range(nbands0):
-        if b == 0:
-            name = 'non-rel spin-up'
-            showlegend = True
-        else:
-            name = 'band{}'.format(b)
-            showlegend = False
-        fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eks0'][:,b],name=name,
-                        line={'dash':'dot','color':'black'},row=1, col=1,
-                       showlegend=showlegend)
+    if single_trace:
+        families = [('Eks0','non-rel spin-up',{'dash':'dot','color':'black'}),
+                    ('Eks1','non-rel spin-down',{'dash':'dash','color':'black'}),
+                    ('Eksr','rel',{'color':'black'})]
+        for key,name,line in families:
+            x,y = join_bands(np.asarray(bands_data['xdata']),bands_data[key])
+            fig.add_trace(go.Scattergl(x=x,y=y,name=name,mode='lines',line=line),row=1,col=1)
+    else:
+        nbands0 = bands_data['Eks0'].shape[1]
+        for b in range(nbands0):
+            if b == 0:
+                name = 'non-rel spin-up'
+                showlegend = True
+            else:
+                name = 'band{}'.format(b)
+                showlegend = False
+            fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eks0'][:,b],name=name,
+                            line={'dash':'dot','color':'black'},row=1, col=1,
+                           showlegend=showlegend)
         
-    nbands1 = bands_data['Eks1'].shape[1]
-    for b in range(nbands0):
-        if b == 0:
-            name = 'non-rel spin-down'
-            showlegend = True
-        else:
-            name = 'band{}'.format(b)
-            showlegend = False
-        fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eks1'][:,b],name=name,
-                        line={'dash':'dash','color':'black'},row=1, col=1,
-                       showlegend=showlegend)
+        nbands1 = bands_data['Eks1'].shape[1]
+        for b in range(nbands0):
+            if b == 0:
+                name = 'non-rel spin-down'
+                showlegend = True
+            else:
+                name = 'band{}'.format(b)
+                showlegend = False
+            fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eks1'][:,b],name=name,
+                            line={'dash':'dash','color':'black'},row=1, col=1,
+                           showlegend=showlegend)
         
-    nbands = bands_data['Eksr'].shape[1]
-    for b in range(nbands):
-        if b == 0:
-            name = 'rel'
-            showlegend = True
-        else:
-            name = 'band{}'.format(b)
-            showlegend = False
-        fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eksr'][:,b],name=name,
-                        line={'color':'black'},row=1, col=1,showlegend=showlegend)        
+        nbands = bands_data['Eksr'].shape[1]
+        for b in range(nbands):
+            if b == 0:
+                name = 'rel'
+                showlegend = True
+            else:
+                name = 'band{}'.format(b)
+                showlegend = False
+            fig.add_scatter(x=bands_data['xdata'],y=bands_data['Eksr'][:,b],name=name,
+                            line={'color':'black'},row=1, col=1,showlegend=showlegend)
 
     if ylim is None:
         ylim = bands_data['ylim']
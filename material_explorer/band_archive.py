@@ -0,0 +1,122 @@
+import os
+import glob
+import argparse
+from os import path
+
+import numpy as np
+import h5py
+
+bands_dir = 'data/bands_all'
+archive_file = 'data/bands_all.hdf5'
+
+index_dtype = np.dtype([
+    ('id', 'S32'),
+    ('offset', 'i8'),
+    ('nk', 'i4'),
+    ('nk2', 'i4'),
+    ('nb', 'i4'),
+    ('nb2', 'i4'),
+    ('npoints', 'i4'),
+    ('label_offset', 'i8'),
+])
+
+def read_band_file(fname):
+    with h5py.File(fname, 'r') as f:
+        kdists = np.array(f['kdists'])
+        kdists2 = np.array(f['kdists2'])
+        erg = np.array(f['erg'])
+        erg2 = np.array(f['erg2'])
+        points = list(f['points'])
+    labels = [p[0].decode() for p in points]
+    positions = [float(p[1].decode()) for p in points]
+    return kdists, kdists2, erg, erg2, labels, positions
+
+def append(dset, values):
+    n = dset.shape[0]
+    dset.resize((n + len(values),))
+    dset[n:] = values
+    return n
+
+def pack_bands(src_dir=bands_dir, archive=archive_file, chunk_size=2**14, compression='lzf',
+               scaleoffset=4):
+    """
+    Merge all band-<id>.hdf5 files into a single archive.
+
+    The k-distances, energies and tick positions of every material are stored as one contiguous
+    slice of the shared 'values' dataset, the tick labels as a slice of 'labels'. The 'index'
+    dataset maps the MP id to the offsets and shapes of the slices. The values are requantized
+    with scaleoffset decimal digits, the band files are quantized to three digits from their own
+    offsets, so the archive differs from them by up to 0.5 10^-scaleoffset (5e-5 for all band
+    files). scaleoffset=None stores them exactly, at about twice the size.
+    """
+    fnames = sorted(glob.glob(path.join(src_dir, 'band-*.hdf5')))
+    index = np.zeros(len(fnames), dtype=index_dtype)
+
+    tmp_archive = archive + '.tmp'
+    with h5py.File(tmp_archive, 'w') as f:
+        values = f.create_dataset('values', shape=(0,), maxshape=(None,), dtype='f8',
+                                  chunks=(chunk_size,), compression=compression,
+                                  scaleoffset=scaleoffset)
+        labels = f.create_dataset('labels', shape=(0,), maxshape=(None,),
+                                  dtype=h5py.string_dtype(), chunks=(1024,))
+        for i, fname in enumerate(fnames):
+            kdists, kdists2, erg, erg2, point_labels, positions = read_band_file(fname)
+            block = np.concatenate([kdists, kdists2, erg.ravel(), erg2.ravel(), positions])
+            index[i] = (path.basename(fname)[5:-5], append(values, block), len(kdists),
+                        len(kdists2), erg.shape[0], erg2.shape[0], len(positions),
+                        append(labels, point_labels))
+        f.create_dataset('index', data=index)
+    os.replace(tmp_archive, archive)
+
+class BandArchive:
+    """
+    Read access to the packed band archive.
+
+    The file is opened lazily and reopened when the process id changes, so an archive opened
+    before the workers are forked is never shared between processes.
+    """
+
+    def __init__(self, fname=archive_file):
+        self.fname = fname
+        self.f = None
+        self.pid = None
+
+    def open(self):
+        if self.f is None or self.pid != os.getpid():
+            self.f = h5py.File(self.fname, 'r')
+            self.pid = os.getpid()
+            self.index = self.f['index'][()]
+            self.positions = {idd.decode(): i for i, idd in enumerate(self.index['id'])}
+        return self.f
+
+    def __contains__(self, idd):
+        self.open()
+        return idd in self.positions
+
+    def get(self, idd):
+        """ Returns kdists, kdists2, erg, erg2 and the list of (label, position) points or None """
+        f = self.open()
+        if idd not in self.positions:
+            return None
+        e = self.index[self.positions[idd]]
+        nk, nk2, nb, nb2, npoints = int(e['nk']), int(e['nk2']), int(e['nb']), int(e['nb2']), int(e['npoints'])
+        length = nk + nk2 + nb * nk + nb2 * nk2 + npoints
+        block = f['values'][e['offset']:e['offset'] + length]
+        labels = f['labels'][e['label_offset']:e['label_offset'] + npoints]
+
+        kdists = block[:nk]
+        kdists2 = block[nk:nk + nk2]
+        o = nk + nk2
+        erg = block[o:o + nb * nk].reshape(nb, nk)
+        o += nb * nk
+        erg2 = block[o:o + nb2 * nk2].reshape(nb2, nk2)
+        o += nb2 * nk2
+        points = [(l.decode(), p) for l, p in zip(labels, block[o:])]
+        return kdists, kdists2, erg, erg2, points
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack the band files into a single archive.')
+    parser.add_argument('src_dir', nargs='?', default=bands_dir)
+    parser.add_argument('archive', nargs='?', default=archive_file)
+    args = parser.parse_args()
+    pack_bands(args.src_dir, args.archive)
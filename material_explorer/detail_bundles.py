@@ -0,0 +1,112 @@
+import os
+import json
+import zlib
+import hashlib
+import inspect
+import argparse
+from os import path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import h5py
+import plotly
+
+details_file = 'data/material_details.hdf5'
+
+index_dtype = np.dtype([
+    ('id', 'S32'),
+    ('offset', 'i8'),
+    ('length', 'i8'),
+])
+
+def get_version(functions, paths):
+    """
+    Hash of the source code of the functions that create the bundles and of the size and
+    modification time of the data files they are created from.
+    """
+    h = hashlib.sha256()
+    h.update(plotly.__version__.encode())
+    for function in functions:
+        h.update(inspect.getsource(function).encode())
+    for p in paths:
+        if path.isdir(p):
+            fnames = sorted(path.join(p, f) for f in os.listdir(p))
+        else:
+            fnames = [p]
+        for fname in fnames:
+            if path.isfile(fname):
+                st = os.stat(fname)
+                h.update('{} {} {}'.format(fname, st.st_size, st.st_mtime_ns).encode())
+    return h.hexdigest()
+
+def render_bundle(idd):
+    import material_explorer.me_app as me_app
+    details = me_app.create_material_details(idd)
+    data = json.dumps(details, cls=plotly.utils.PlotlyJSONEncoder).encode()
+    return idd, zlib.compress(data)
+
+def build_bundles(fname=details_file, n_workers=None, chunksize=16):
+    """ Render the details of all materials in the database into a single indexed file """
+    import material_explorer.me_app as me_app
+
+    ids = list(me_app.df['id'])
+    index = np.zeros(len(ids), dtype=index_dtype)
+
+    tmp_fname = fname + '.tmp'
+    with h5py.File(tmp_fname, 'w') as f:
+        data = f.create_dataset('data', shape=(0,), maxshape=(None,), dtype='u1', chunks=(2**20,))
+        with ProcessPoolExecutor(n_workers) as executor:
+            for i, (idd, bundle) in enumerate(executor.map(render_bundle, ids, chunksize=chunksize)):
+                offset = data.shape[0]
+                data.resize((offset + len(bundle),))
+                data[offset:] = np.frombuffer(bundle, dtype='u1')
+                index[i] = (idd, offset, len(bundle))
+        f.create_dataset('index', data=index)
+        f.attrs['version'] = me_app.details_version()
+    os.replace(tmp_fname, fname)
+
+class DetailBundles:
+    """
+    Read access to the prebuilt material details.
+
+    The file is only used if it was built with the given version. As the band archive it is
+    opened lazily and reopened when the process id changes.
+    """
+
+    def __init__(self, fname=details_file, version=None):
+        self.fname = fname
+        self.version = version
+        self.f = None
+        self.pid = None
+        self.positions = {}
+
+    def open(self):
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.f = None
+            self.positions = {}
+            if path.isfile(self.fname):
+                f = h5py.File(self.fname, 'r')
+                if f.attrs.get('version') == self.version:
+                    self.f = f
+                    self.index = f['index'][()]
+                    self.positions = {idd.decode(): i for i, idd in enumerate(self.index['id'])}
+                else:
+                    print('Material details in {} are outdated, not using them'.format(self.fname))
+                    f.close()
+        return self.f
+
+    def get(self, idd):
+        f = self.open()
+        if f is None or idd not in self.positions:
+            return None
+        e = self.index[self.positions[idd]]
+        bundle = f['data'][e['offset']:e['offset'] + e['length']]
+        return json.loads(zlib.decompress(bundle.tobytes()))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prebuild the material details of the explorer.')
+    parser.add_argument('fname', nargs='?', default=details_file)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    build_bundles(args.fname, args.workers)
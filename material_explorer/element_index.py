@@ -0,0 +1,113 @@
+import re
+
+import numpy as np
+
+elements = [
+    'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'P', 'S',
+    'Cl', 'Ar', 'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Ga',
+    'Ge', 'As', 'Se', 'Br', 'Kr', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd',
+    'Ag', 'Cd', 'In', 'Sn', 'Sb', 'Te', 'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd', 'Pm',
+    'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm', 'Yb', 'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os',
+    'Ir', 'Pt', 'Au', 'Hg', 'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn', 'Fr', 'Ra', 'Ac', 'Th', 'Pa',
+    'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr', 'Rf', 'Db', 'Sg',
+    'Bh', 'Hs', 'Mt', 'Ds', 'Rg', 'Cn', 'Nh', 'Fl', 'Mc', 'Lv', 'Ts', 'Og']
+element_bits = {e: i for i, e in enumerate(elements)}
+n_words = 2
+
+search_modes = {
+    'all': 'contains all',
+    'any': 'contains any',
+    'only': 'only these elements',
+}
+
+def parse_elements(formula):
+    return re.findall(r'[A-Z][a-z]?', formula)
+
+def elements_mask(symbols):
+    """ Returns the bitmask of the given element symbols and the list of unknown symbols """
+    mask = np.zeros(n_words, dtype=np.uint64)
+    unknown = []
+    for e in symbols:
+        if e not in element_bits:
+            unknown.append(e)
+            continue
+        bit = element_bits[e]
+        mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+    return mask, unknown
+
+def parse_query(query):
+    symbols = []
+    for token in query.split():
+        symbols += parse_elements(token[0].upper() + token[1:])
+    return elements_mask(symbols)
+
+def is_subset(a, b):
+    return bool(np.all(a & ~b == 0))
+
+class ElementIndex:
+    """
+    Element bitmasks of all materials, stored as n_words contiguous uint64 arrays.
+
+    The result of the last search is kept so that a query that only narrows the previous one
+    (for example when the user types one more element) is evaluated on the previous result only.
+    It is the last search of the worker, shared by all users, not the last one of a session; it
+    is replaced as a whole, so a search refines a consistent previous result.
+    """
+
+    def __init__(self, formulas):
+        self.masks = np.zeros((n_words, len(formulas)), dtype=np.uint64)
+        for i, formula in enumerate(formulas):
+            self.masks[:, i], _ = elements_mask(parse_elements(formula))
+        self.last = None
+
+    def match(self, masks, qmask, mode):
+        matches = None
+        for w in range(n_words):
+            q = qmask[w]
+            if mode == 'all':
+                if q == 0:
+                    continue
+                m = masks[w] & q == q
+            elif mode == 'any':
+                if q == 0:
+                    continue
+                m = masks[w] & q != 0
+            elif mode == 'only':
+                m = masks[w] & ~q == 0
+            else:
+                raise Exception('Unknown search mode {}'.format(mode))
+            if matches is None:
+                matches = m
+            elif mode == 'any':
+                matches |= m
+            else:
+                matches &= m
+        if matches is None:
+            matches = np.full(masks.shape[1], mode == 'all')
+        return matches
+
+    def narrows_last(self, last, qmask, mode):
+        if last is None or last[0] != mode:
+            return False
+        last_qmask = last[1]
+        if mode == 'all':
+            return is_subset(last_qmask, qmask)
+        else:
+            return is_subset(qmask, last_qmask)
+
+    def search(self, query, mode='all'):
+        """ Returns the sorted row positions of the materials matching the query """
+        qmask, unknown = parse_query(query)
+        if mode == 'all' and len(unknown) > 0:
+            return np.zeros(0, dtype=np.intp)
+
+        # Read once, other threads of the server may replace it during the search
+        last = self.last
+        if self.narrows_last(last, qmask, mode):
+            rows = last[2]
+            rows = rows[self.match(self.masks[:, rows], qmask, mode)]
+        else:
+            rows = np.flatnonzero(self.match(self.masks, qmask, mode))
+
+        self.last = (mode, qmask, rows)
+        return rows
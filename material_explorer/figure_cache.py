@@ -0,0 +1,54 @@
+import json
+from collections import OrderedDict
+
+import plotly
+
+class FigureCache:
+    """
+    LRU cache of serialized callback outputs with a limit on the total size in bytes.
+
+    Values are stored as json encoded bytes, so the size of the cache is known exactly and
+    cached figures can not be modified by the callbacks that use them.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return json.loads(self.entries[key])
+
+    def put(self, key, value):
+        data = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder).encode()
+        if len(data) > self.max_bytes:
+            return
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.size -= len(old)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
@@ -5,21 +5,34 @@ import dash_bootstrap_components as dbc
 from dash import dash_table
 from dash_table.Format import Format, Scheme
 import plotly.graph_objects as go
-import pandas as pd
-import numpy as np
-import h5py
+import flask
+import os
 
 #app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 from os import sys, path
 sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
 from app import app
 from common import Navbar, column_names, inv_column_names
-
-df = pd.read_json('data/paper_database.json')
+from database import load_summary, database_json, database_store, DetailStore, MaterialIndex
+from interpolate import join_bands
+from material_explorer.element_index import ElementIndex, search_modes
+from material_explorer.band_archive import BandArchive, archive_file, read_band_file
+from material_explorer.figure_cache import FigureCache
+from material_explorer.detail_bundles import DetailBundles, details_file, get_version
+
+df = load_summary()
+material_index = MaterialIndex(df['id'], DetailStore())
 dfs = df[['formula','id','norm_h','Hall_angle','spacegroup','cond_xx',
           'gamma_convergence','k_convergence','total_magnetization']]
 dfs.sort_values(by='norm_h',ascending=False,inplace=True)
+element_index = ElementIndex(dfs['formula'])
 gammas = [0.0001, 0.0005, 0.001, 0.005, 0.01]
+band_archive = BandArchive(archive_file)
+
+# Size of the per-worker cache of material details and the number of materials with the
+# largest AHE that are rendered when the worker starts.
+figure_cache = FigureCache(int(os.environ.get('FIGURE_CACHE_BYTES', 64 * 2**20)))
+figure_cache_warmup = int(os.environ.get('FIGURE_CACHE_WARMUP', 0))
 
 def create_cond_figure(X,offdiag=False):
 
@@ -107,29 +120,45 @@ def create_AHE_figure(X):
 
     return fig
 
-def plot_bands(idd):
+def read_bands(idd):
+
+    if path.isfile(archive_file):
+        return band_archive.get(idd)
 
     filepath = 'data/bands_all/band-{}.hdf5'.format(idd)
 
     if not path.isfile(filepath):
         return None
 
-    with h5py.File(filepath, 'r') as f:
-        kdists = np.array(f['kdists'])
-        kdists2 = np.array(f['kdists2'])
-        erg = np.array(f['erg'])
-        erg2 = np.array(f['erg2'])
-        points = list(f['points'])
+    kdists, kdists2, erg, erg2, labels, positions = read_band_file(filepath)
+    return kdists, kdists2, erg, erg2, list(zip(labels, positions))
+
+def plot_bands(idd,single_trace=True):
+
+    bands = read_bands(idd)
+    if bands is None:
+        return None
+    kdists, kdists2, erg, erg2, points = bands
 
     fig = go.Figure()
-    for b in range(erg.shape[0]):
-        fig.add_trace(go.Scatter(x=kdists,y=erg[b,:],line={'color':'black','width':5}))
-        fig.add_trace(go.Scatter(x=kdists2,y=erg2[b,:],line={'color':'red','dash':'dash'}))
+    if single_trace:
+        # rounded to the four decimal digits of the band archive, which makes the figure 40% smaller,
+        # the values then differ from the band files by up to 1e-4
+        x, y = join_bands(kdists, erg.T, decimals=4)
+        fig.add_trace(go.Scattergl(x=x,y=y,mode='lines',line={'color':'black','width':5}))
+        x, y = join_bands(kdists2, erg2.T, decimals=4)
+        fig.add_trace(go.Scattergl(x=x,y=y,mode='lines',line={'color':'red','dash':'dash'}))
+    else:
+        for b in range(max(erg.shape[0],erg2.shape[0])):
+            if b < erg.shape[0]:
+                fig.add_trace(go.Scatter(x=kdists,y=erg[b,:],line={'color':'black','width':5}))
+            if b < erg2.shape[0]:
+                fig.add_trace(go.Scatter(x=kdists2,y=erg2[b,:],line={'color':'red','dash':'dash'}))
     fig.update_layout(
         xaxis = dict(
             tickmode = 'array',
-            tickvals = [float(points[i][1].decode()) for i in range(len(points))],
-            ticktext = [points[i][0].decode() for i in range(len(points))]
+            tickvals = [points[i][1] for i in range(len(points))],
+            ticktext = [points[i][0] for i in range(len(points))]
         )
     )
     fig.update_layout(showlegend=False)
@@ -143,6 +172,39 @@ def plot_bands(idd):
 
     return fig
 
+def create_material_details(idd):
+    row = df.iloc[material_index.position(idd)]
+    X = material_index.get_X(idd)
+    band_plot = plot_bands(idd)
+    if band_plot is None:
+        band_plot = go.Figure()
+        band_warning = False
+        band_figure_hidden = True
+    else:
+        band_warning = True
+        band_figure_hidden = False
+    return (create_cond_figure(X),
+            create_cond_offdiag_figure(X),
+           create_AHE_figure(X),
+            band_plot,
+           row['formula'],
+           'https://materialsproject.org/materials/{}/'.format(idd),
+           False,
+           band_warning,
+           band_figure_hidden,
+           )
+
+def details_version():
+    functions = [create_cond_figure, create_cond_offdiag_figure, create_AHE_figure,
+                 read_bands, plot_bands, join_bands, create_material_details]
+    paths = [database_json, database_store, archive_file, 'data/bands_all']
+    return get_version(functions, paths)
+
+def warm_up_figure_cache(n):
+    for idd in dfs['id'].iloc[:n]:
+        if idd not in figure_cache:
+            figure_cache.put(idd, create_material_details(idd))
+
 def get_data_type(name):
     if name in ['norm_g','spacegroup','magnetic_symmetry','Hall_angle','total_magnetization',
                 'gamma_convergence','k_convergence']:
@@ -158,9 +220,74 @@ def get_data_format(name):
     else:
         return None
 
+filter_operators = [['ge ', '>='],
+                    ['le ', '<='],
+                    ['lt ', '<'],
+                    ['gt ', '>'],
+                    ['ne ', '!='],
+                    ['eq ', '='],
+                    ['contains '],
+                    ['datestartswith ']]
+
+def split_filter_part(filter_part):
+    for operator_type in filter_operators:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if len(value_part) > 1 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, operator_type[0].strip(), value
+    return [None] * 3
+
+def filter_table(dff, filter_query):
+    if not filter_query:
+        return dff
+    for filter_part in filter_query.split(' && '):
+        name, operator, value = split_filter_part(filter_part)
+        if name not in dff.columns:
+            continue
+        if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            if dff[name].dtype.kind in 'biuf':
+                if isinstance(value, str):
+                    continue
+                dff = dff.loc[getattr(dff[name], operator)(value)]
+            else:
+                # Text columns are compared as strings, as by the filtering in the browser
+                if not isinstance(value, str):
+                    value = str(int(value)) if value.is_integer() else str(value)
+                dff = dff.loc[getattr(dff[name].astype(str), operator)(value)]
+        elif operator == 'contains':
+            dff = dff.loc[dff[name].astype(str).str.contains(str(value), regex=False)]
+        elif operator == 'datestartswith':
+            dff = dff.loc[dff[name].astype(str).str.startswith(str(value))]
+    return dff
+
+def sort_table(dff, sort_by):
+    if not sort_by:
+        return dff
+    return dff.sort_values(
+        [col['column_id'] for col in sort_by],
+        ascending=[col['direction'] == 'asc' for col in sort_by],
+        kind='stable')
+
+def get_page(dff, page_current, page_size):
+    page_count = max(1, -(-len(dff) // page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    return dff.iloc[start:start + page_size].to_dict('records'), page_count
+
 def create_layout():
 
     fig = go.Figure()
+    page_data, page_count = get_page(dfs, 0, 10)
     fig_AHE = go.Figure()
 
     layout = dbc.Container([
@@ -172,6 +299,13 @@ def create_layout():
                 id="input_search",
                 type="search",
                 placeholder="",
+                ),
+                dcc.RadioItems(
+                    id='search_mode',
+                    options=[{'label': label, 'value': mode} for mode, label in search_modes.items()],
+                    value='all',
+                    inline=True,
+                    inputStyle={"margin-left": "10px", "margin-right": "3px"},
                 )]),
             dbc.Alert('Select material to show more detailed results. The table also supports sorting and filtering'
                       '(you can use operators such as =, > or <). ',
@@ -182,16 +316,18 @@ def create_layout():
                 columns=[{"name": inv_column_names[i], "id": i,
                           "format": get_data_format(i),
                           "type": get_data_type(i)} for i in dfs.columns],
-                data=dfs.to_dict('records'),
-                page_action='native',
+                data=page_data,
+                page_action='custom',
                 page_current= 0,
                 page_size= 10,
-                sort_action="native",
-                filter_action="native",
+                page_count=page_count,
+                sort_action="custom",
+                filter_action="custom",
+                filter_query='',
                 sort_mode='multi',
                 row_selectable='single',
                 fill_width=False,
-                sort_by = [{'column_id':'norm_g','direction':'desc'}]
+                sort_by = []
                 ),
             html.Div([
 
@@ -249,19 +385,21 @@ def create_layout():
 
 @app.callback(
     Output('table', 'data'),
-    Input('input_search', 'value')
+    Output('table', 'page_count'),
+    Input('table', 'page_current'),
+    Input('table', 'page_size'),
+    Input('table', 'sort_by'),
+    Input('table', 'filter_query'),
+    Input('input_search', 'value'),
+    Input('search_mode', 'value')
 )
-def update_table(value):
-    def contains(row):
-        for ele in value.split():
-            print(value.split())
-            if ele not in row['formula']:
-                return False
-        return True
-        
-    if value == '' or value is None:
-        return dfs.to_dict('records')
-    return dfs[dfs.apply(contains,axis=1)].to_dict('records')
+def update_table(page_current, page_size, sort_by, filter_query, value, mode):
+    dff = dfs
+    if value is not None and value.strip() != '':
+        dff = dff.iloc[element_index.search(value, mode)]
+    dff = filter_table(dff, filter_query)
+    dff = sort_table(dff, sort_by)
+    return get_page(dff, page_current, page_size)
 
 @app.callback(
     Output('fig_cond', 'figure'),
@@ -289,23 +427,17 @@ def test_row(selected_rows_ids):
                )
     else:
         idd = selected_rows_ids[0]
-        row = df[df['id'] == idd].iloc[0]
-        X = np.array(row['X'])
-        band_plot = plot_bands(idd)
-        if band_plot is None:
-            band_plot = go.Figure()
-            band_warning = False
-            band_figure_hidden = True
-        else:
-            band_warning = True
-            band_figure_hidden = False
-        return (create_cond_figure(X),
-                create_cond_offdiag_figure(X),
-               create_AHE_figure(X),
-                band_plot,
-               row['formula'],
-               'https://materialsproject.org/materials/{}/'.format(idd),
-               False,
-               band_warning,
-               band_figure_hidden,
-               )
+        details = detail_bundles.get(idd)
+        if details is None:
+            details = figure_cache.get(idd)
+        if details is None:
+            details = create_material_details(idd)
+            figure_cache.put(idd, details)
+        return details
+
+@app.server.route('/material_explorer/cache_stats')
+def cache_stats():
+    return flask.jsonify(figure_cache.stats())
+
+detail_bundles = DetailBundles(details_file, details_version())
+warm_up_figure_cache(figure_cache_warmup)
@@ -4,8 +4,16 @@ try:
 except:
     aiida_available = False
 
+import itertools
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from scipy.interpolate import RegularGridInterpolator
+from scipy.linalg import lu_factor,lu_solve
+from scipy import ndimage
+from scipy.spatial import cKDTree
 import matplotlib.pyplot as plt
 
 import plotly.graph_objects as go
@@ -20,78 +28,277 @@ except:
 
 from htp.analysis.crossings_finder import get_Eks,get_slabify_path,get_hamdata_path,get_conv2prim_T
 
-def get_Xkd(pk):
+from interpolate import interpolate_to_new_grid,iter_new_grid,fourier_resample_axis,k_contribution,plotly_k_contribution,iter_values
+from nodal_lines.hotspots import find_hotspots,label_regions
+
+# Assumed layout of k_resolved.out for read_k_resolved_component: each line holds one k-point,
+# k_cols columns with its fractional coordinates followed by the values of all components
+# flattened in C order of k_resolved_shape. read_k_resolved from analyze_res is the reference,
+# check_k_resolved_reader compares the two on a real file.
+k_cols = 3
+k_resolved_shape = (3,3,6)
+
+def count_data_lines(fname):
+    n = 0
+    with open(fname,'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(b'#'):
+                n += 1
+    return n
+
+def read_k_resolved_component(fname,component=(0,1,5),shape=None,out=None,chunk_lines=10000,
+                              allow_missing=False,tol=1e-6):
+    """
+    Reads one component of k_resolved.out into an array of the k-mesh shape, chunk_lines lines
+    at a time, so only one component of the whole mesh is held in memory.
+
+    Each line must have k_cols + prod(k_resolved_shape) columns and each value is placed by its
+    k-point, which must lie on the mesh (within tol) and appear once. k-points missing from the
+    file raise, or are NaN with allow_missing. component is an index into k_resolved_shape or
+    the position of the value column. shape is the k-mesh, if not given the file is counted
+    first and the mesh taken as cubic. out is an array to fill or the name of a .npy file, which
+    is then written through a memory map.
+    """
+    n_cols = k_cols + int(np.prod(k_resolved_shape))
+    if not isinstance(component,int):
+        component = int(np.ravel_multi_index(component,k_resolved_shape))
+    if shape is None:
+        n = count_data_lines(fname)
+        nk = int(round(n**(1/3)))
+        if nk**3 != n and not allow_missing:
+            raise Exception('{} has {} k-points, which is not a cubic mesh'.format(fname,n))
+        shape = (nk,nk,nk)
+    shape = tuple(shape)
+    if out is None:
+        out = np.empty(shape)
+    elif isinstance(out,str):
+        out = np.lib.format.open_memmap(out,mode='w+',dtype=float,shape=shape)
+    out[...] = np.nan
+    filled = np.zeros(shape,dtype=bool)
+
+    with open(fname) as f:
+        while True:
+            lines = list(itertools.islice(f,chunk_lines))
+            if not lines:
+                break
+            # All columns are parsed, loadtxt raises if their number changes between lines
+            data = np.loadtxt(lines,comments='#',ndmin=2)
+            if len(data) == 0:
+                continue
+            if data.shape[1] != n_cols:
+                raise Exception('{} has {} columns, the layout has {}'.format(fname,data.shape[1],n_cols))
+            ijk = data[:,:k_cols]*shape
+            idx = np.round(ijk)
+            if np.any(np.abs(ijk-idx) > tol*np.array(shape)):
+                raise Exception('{} has k-points that are not on the mesh {}'.format(fname,shape))
+            idx = tuple((idx.astype(int) % shape).T)
+            if np.any(filled[idx]) or len(np.unique(np.ravel_multi_index(idx,shape))) != len(data):
+                raise Exception('{} has repeated k-points'.format(fname))
+            filled[idx] = True
+            out[idx] = data[:,k_cols+component]
+    if not allow_missing and not filled.all():
+        raise Exception('{} misses {} k-points of the mesh {}'.format(fname,np.count_nonzero(~filled),shape))
+    if isinstance(out,np.memmap):
+        out.flush()
+    return out
+
+def convert_k_resolved_file(fname,out_fname,component,shape):
+    read_k_resolved_component(fname,component,shape,out_fname)
+    return out_fname
+
+def convert_k_resolved(fnames,out_fnames,component=(0,1,5),shape=None,n_workers=None):
+    """ Converts one component of each of the k_resolved.out files into a .npy file, in parallel """
+    n = len(fnames)
+    with ProcessPoolExecutor(n_workers) as executor:
+        return list(executor.map(convert_k_resolved_file,fnames,out_fnames,[component]*n,[shape]*n))
+
+def check_k_resolved_reader(fname,component=(0,1,5)):
+    """ Compares read_k_resolved_component with read_k_resolved on fname, returns the largest difference """
+    if not analyze_res_available:
+        raise Exception("Need analyze_res")
+    Xk = read_k_resolved(fname)
+    Xkd = Xk[(slice(None),)*3 + tuple(component)].data
+    Xkd_s = read_k_resolved_component(fname,component,shape=Xkd.shape,allow_missing=True)
+    return np.nanmax(np.abs(Xkd-Xkd_s))
+
+def get_Xkd(pk,component=(0,1,5),stream=False):
+    """
+    Reads one component of the k-resolved output of the calculation pk with read_k_resolved, or
+    with stream with read_k_resolved_component, which only holds that component in memory.
+    """
     if not aiida_available:
         raise Exception("Need aiid")
+    n = load_node(pk)
+    fname = n.outputs.retrieved._repository._get_base_folder().get_abs_path('k_resolved.out')
+    if stream:
+        return read_k_resolved_component(fname,component)
     if not analyze_res_available:
         raise Exception("Need analyze_res")
-    n = load_node(pk)
-    Xk = read_k_resolved(n.outputs.retrieved._repository._get_base_folder().get_abs_path('k_resolved.out'))
-    Xkd = Xk[:,:,:,0,1,5].data
+    Xk = read_k_resolved(fname)
+    Xkd = Xk[(slice(None),)*3 + tuple(component)].data
     return Xkd
 
-def plot_k_contribution(Xkd,maxt=None):
-    
-    Xkdl = Xkd.reshape(Xkd.shape[0]**3)
-    sums = []
-    lengths = []
-    
-    if maxt is None:
-        maxt = np.max(np.abs(Xkdl))
-    tres = np.logspace(1,np.log10(maxt),200) 
-    
-    tot_sum = np.sum(Xkdl)
-    tot_length = Xkdl.shape[0]
-    
-    for i in tres:
-        Xkdl_s = Xkdl[np.abs(Xkdl) < i]
-        sums.append(np.sum(Xkdl_s)/tot_sum)
-        lengths.append(float(Xkdl_s.shape[0])/tot_length)
+def plot_k_contribution(Xkd,maxt=None,chunk_size=None):
+
+    tres,sums,lengths = k_contribution(Xkd,maxt=maxt,chunk_size=chunk_size)
     plt.figure()
     plt.plot(tres,sums)
     plt.plot(tres,lengths)
     plt.xscale('log')
-
-def interpolate_to_new_grid(Xkd,nk):
-    shape = Xkd.shape
-    xyz = tuple([np.linspace(0,1,shape[i],endpoint=False) for i in range(3)])
-    intp = RegularGridInterpolator(xyz,Xkd)
-    kpts = []
-    for i in range(nk):
-        for j in range(nk):
-            for k in range(nk):
-                kpts.append(np.array([float(i),float(j),float(k)])/nk)
-    return np.array(kpts),intp(kpts)
+    return tres,sums,lengths
+
+def plane_coordinates(k1,k2,shift,T,ks,tol=1e-12):
+    """
+    Coordinates in the plane spanned by k1,k2 through shift of the k-points ks (m x 3), which
+    are given in the basis transformed by T if T is not None. All points are projected with
+    one factorization, k = T (A k_p + shift) with A = (k1,k2,k1 x k2). Raises if a point is
+    further than tol out of the plane (in units of k1 x k2), unless tol is None.
+    """
+    ks = np.asarray(ks,dtype=float).reshape(-1,3)
+    A = np.column_stack([k1,k2,np.cross(k1,k2)])
+    if T is not None:
+        A = np.dot(T,A)
+        shift = np.dot(T,shift)
+    k_p = lu_solve(lu_factor(A),(ks-shift).T).T
+    if tol is not None and np.any(np.abs(k_p[:,2]) > tol):
+        raise Exception('k-point does not lie in the plane')
+    return k_p[:,0:2]
 
 def get_plane_coordinates(k1,k2,shift,T,k):
+    return plane_coordinates(k1,k2,shift,T,[k])[0]
+
+class CrossingIndex:
+    """
+    Periodic spatial index of the crossing points of all bands, for selecting the points near
+    any plane. The points are wrapped into the unit cell and kept in one cKDTree with periodic
+    boundaries.
+    """
+
+    def __init__(self, crossing_ks):
+        self.n_bands = len(crossing_ks)
+        self.offsets = np.cumsum([0] + [len(c) for c in crossing_ks])
+        points = np.asarray([k for c in crossing_ks for k in c],dtype=float).reshape(-1,3) % 1
+        points[points >= 1] = 0
+        self.points = points
+        self.bands = np.repeat(np.arange(self.n_bands),np.diff(self.offsets))
+        self.tree = cKDTree(points,boxsize=1)
+
+    def slab(self, k1, k2, shift=np.array([0,0,0]), T=None, tol=0.01):
+        """
+        The crossing points within tol of the patch k = T (a k1 + b k2 + shift), a,b in [0,1),
+        with any of their periodic images, as their plane coordinates a,b for each band, like the
+        crossing points returned by interpolate_to_plane. k1,k2 need not be lattice vectors, the
+        coordinates are not wrapped.
+
+        The patch is covered by ball queries on a grid of spacing 4 tol (at most 33 x 33 points,
+        including the edges a=1 and b=1), with radii covering the space between the grid points,
+        the points found are then projected on the plane exactly.
+        """
+        A = np.column_stack([k1,k2]).astype(float)
+        if T is not None:
+            A = np.dot(T,A)
+            shift = np.dot(T,shift)
+        A = np.column_stack([A,np.cross(A[:,0],A[:,1])])
+        normal_length = np.linalg.norm(A[:,2])
+
+        lengths = np.linalg.norm(A[:,:2],axis=0)
+        # Beyond about 32 x 32 queries each query costs more than the candidates it saves
+        n_ab = min(int(np.ceil(max(lengths)/(4*tol))),32)
+        ab = np.arange(n_ab+1)/n_ab
+        centers = np.dot(np.stack(np.meshgrid(ab,ab,indexing='ij'),axis=-1).reshape(-1,2),A[:,:2].T) + shift
+        centers_w = centers % 1
+        centers_w[centers_w >= 1] = 0
+        radius = tol + np.sum(lengths)/(2*n_ab)
+        found = self.tree.query_ball_point(centers_w,radius,return_sorted=False)
+
+        lengths = np.array([len(f) for f in found])
+        points_i = np.concatenate([np.asarray(f,dtype=int) for f in found]) if lengths.sum() else np.zeros(0,dtype=int)
+        centers_i = np.repeat(np.arange(len(centers)),lengths)
+        d = self.points[points_i] - centers_w[centers_i]
+        d -= np.round(d)
+        k_p = lu_solve(lu_factor(A),(centers[centers_i] + d - shift).T).T
+        dist = np.abs(k_p[:,2])*normal_length
+
+        # Only the images on the patch, the points past its edges are not wrapped back onto it
+        keep = (dist <= tol) & np.all((k_p[:,:2] >= 0) & (k_p[:,:2] < 1),axis=1)
+        points_i,k_p,dist = points_i[keep],k_p[keep],dist[keep]
+        # Each point once, from the closest image of the plane
+        order = np.lexsort((dist,points_i))
+        points_i,k_p = points_i[order],k_p[order]
+        first = np.concatenate([[True],points_i[1:] != points_i[:-1]]) if len(points_i) else np.zeros(0,dtype=bool)
+        points_i,ab_p = points_i[first],k_p[first,:2]
+
+        bands = self.bands[points_i]
+        return [ab_p[bands == b] for b in range(self.n_bands)]
+
+def slab_brute_force(crossing_ks,k1,k2,shift=np.array([0,0,0]),T=None,tol=0.01,n_images=2):
+    """ CrossingIndex.slab by projecting every lattice image (up to n_images away) of every point """
+    A = np.column_stack([k1,k2]).astype(float)
     if T is not None:
-        k = np.dot(np.linalg.inv(T),k)
-    A = np.column_stack([k1,k2,np.cross(k1,k2)])
-    k_p = np.linalg.solve(A,k-shift)
-    if abs(k_p[2]) > 1e-12:
-        raise Exception('k-point does not lie in the plane')
-    return k_p[0:2]
+        A = np.dot(T,A)
+        shift = np.dot(T,shift)
+    A = np.column_stack([A,np.cross(A[:,0],A[:,1])])
+    normal_length = np.linalg.norm(A[:,2])
+    images = np.array(list(itertools.product(range(-n_images,n_images+1),repeat=3)))
+    lu = lu_factor(A)
+    slabs = []
+    for c in crossing_ks:
+        points = np.asarray(c,dtype=float).reshape(-1,3) % 1
+        points[points >= 1] = 0
+        ab = np.zeros((0,2))
+        if len(points):
+            k_p = lu_solve(lu,(points[:,None,:] + images[None,:,:] - shift).reshape(-1,3).T).T.reshape(len(points),len(images),3)
+            dist = np.abs(k_p[:,:,2])*normal_length
+            inside = (dist <= tol) & np.all((k_p[:,:,:2] >= 0) & (k_p[:,:,:2] < 1),axis=2)
+            dist[~inside] = np.inf
+            closest = np.argmin(dist,axis=1)
+            found = np.isfinite(dist[np.arange(len(points)),closest])
+            ab = k_p[found,closest[found],:2]
+        slabs.append(ab)
+    return slabs
+
+def check_crossing_index(n=3000,n_bands=3,tol=0.01,seed=0):
+    """
+    Compares CrossingIndex.slab with slab_brute_force on random points, for a lattice plane, a
+    half-cell patch and a T-transformed patch. Returns the largest difference of the sorted
+    plane coordinates for each, inf if the number of points differs.
+    """
+    rng = np.random.default_rng(seed)
+    crossing_ks = [rng.random((n,3)) for b in range(n_bands)]
+    index = CrossingIndex(crossing_ks)
+    T = np.array([[1.,1.,0.],[-1.,1.,0.],[0.,0.,1.]])/2
+    planes = {
+        'lattice': (np.array([1,1,0]),np.array([0,0,1]),np.array([0,0,0]),None),
+        'half cell': (np.array([.5,0,0]),np.array([0,1,0]),np.array([0,0,.3]),None),
+        'transformed': (np.array([1,.5,0]),np.array([0,0,1]),np.array([.2,0,0]),T),
+    }
+    diffs = {}
+    for name,(k1,k2,shift,T_p) in planes.items():
+        diff = 0.
+        for ab,ab_b in zip(index.slab(k1,k2,shift,T_p,tol),slab_brute_force(crossing_ks,k1,k2,shift,T_p,tol)):
+            if len(ab) != len(ab_b):
+                diff = np.inf
+                break
+            if len(ab):
+                diff = max(diff,np.abs(ab[np.lexsort(ab.T)]-ab_b[np.lexsort(ab_b.T)]).max())
+        diffs[name] = diff
+    return diffs
 
 def interpolate_to_plane(Xkd,crossing_ks=None,k1=None,k2=None,shift=np.array([0,0,0]),T=None,nk=100):
 
     intp = get_interpolator(Xkd)    
 
-    Xkd_p = np.zeros((nk,nk))
-    for i in range(nk):
-        for j in range(nk):
-            k_ij = (float(i)/nk)*k1 + (float(j)/nk)*k2 + shift
-            if T is not None:
-                k_ij = np.dot(T,k_ij)
-            k_ij = [x % 1 for x in k_ij]
-            Xkd_p[i,j] = intp(k_ij)
+    ks = np.arange(nk)/nk
+    k_ij = ks[:,None,None]*k1 + ks[None,:,None]*k2 + shift
+    if T is not None:
+        k_ij = np.dot(k_ij,np.transpose(T))
+    Xkd_p = intp(k_ij % 1)
 
     if crossing_ks is not None:
-        crossing_ks_p = []
-        for i in range(len(crossing_ks)):
-            crossing_ks_p.append([])
-            for j in range(len(crossing_ks[i])):
-                crossing_ks_p[i].append(get_plane_coordinates(k1,k2,shift,T,crossing_ks[i][j]))
-            crossing_ks_p[i] = np.array(crossing_ks_p[i])
+        offsets = np.cumsum([0] + [len(c) for c in crossing_ks])
+        k_p = plane_coordinates(k1,k2,shift,T,[k for c in crossing_ks for k in c])
+        crossing_ks_p = [k_p[offsets[i]:offsets[i+1]] for i in range(len(crossing_ks))]
     else:
         crossing_ks_p = None
 
@@ -138,24 +345,33 @@ def plotly_plane(Xkd_p,crossing_ks_p=None,vmax=None,vmax_sf=3,bands=None,legend=
 
     return fig
 
-def plot_hist(Xkd,bins=1000):
-
-    nk = Xkd.shape[0]
-    
-    vals,bins,patches = plt.hist(np.abs(Xkd.reshape(nk*nk*nk)),bins=bins)
+def hist_curves(Xkd,bins=1000,chunk_size=None):
+    """
+    Histogram of |Xkd| with the contribution of each bin (its middle times its count) and the
+    cumulative contributions of the bins below and above each bin. With chunk_size Xkd is read
+    in chunks as in k_contribution. Returns the bin edges, counts, contributions, below, above.
+    """
+    if chunk_size is None:
+        counts,edges = np.histogram(np.abs(Xkd).reshape(-1),bins=bins)
+    else:
+        lo = min(np.min(np.abs(c)) for c in iter_values(Xkd,chunk_size))
+        hi = max(np.max(np.abs(c)) for c in iter_values(Xkd,chunk_size))
+        counts = 0
+        for c in iter_values(Xkd,chunk_size):
+            counts_c,edges = np.histogram(np.abs(c),bins=bins,range=(lo,hi))
+            counts = counts + counts_c
+    bins_middle = edges[:-1] + np.diff(edges)/2
+    int_vals = bins_middle*counts
+    cumsum = np.concatenate([[0],np.cumsum(int_vals)])
+    return edges,counts,int_vals,cumsum[:-1],cumsum[-1]-cumsum[:-1]
+
+def plot_hist(Xkd,bins=1000,chunk_size=None):
+
+    edges,vals,int_vals,sum_int_vals1,sum_int_vals2 = hist_curves(Xkd,bins,chunk_size)
+    bins_middle = edges[:-1] + np.diff(edges)/2
+
+    plt.hist(edges[:-1],edges,weights=vals)
     plt.yscale('log')
-    
-    int_vals = []
-    bins_middle = []
-    sum_int_vals1 = []
-    sum_int_vals2 = []
-    for i in range(len(vals)):
-        bm = bins[i]+ (bins[i+1]-bins[i])/2
-        bins_middle.append(bm)
-        int_vals.append(bm * vals[i])
-    for i in range(len(int_vals)):
-        sum_int_vals1.append(sum(int_vals[:i]))
-        sum_int_vals2.append(sum(int_vals[i:]))
     plt.figure()
     plt.plot(bins_middle,int_vals)
     plt.yscale('log')
@@ -177,52 +393,104 @@ def get_reciprocal_lattice(B):
 
 
 
-def get_interpolator(Xkd):
-    shape = Xkd.shape
-    shape2 = [s+1 for s in shape]
-    Xkd2 = np.zeros(shape2)
-    Xkd2[:shape[0],:shape[1],:shape[2]] = Xkd
-    Xkd2[-1,:shape[1],:shape[2]] = Xkd[0,:,:]
-    Xkd2[:shape[0],-1,:shape[2]] = Xkd[:,0,:]
-    Xkd2[:shape[0],:shape[1],-1] = Xkd[:,:,0]
-    
-    xyz = tuple([np.linspace(0,1,shape2[i],endpoint=True) for i in range(3)])
-    intp = RegularGridInterpolator(xyz,Xkd2)
-    
-    return intp
+class PeriodicInterpolator:
+    """
+    Interpolation of Xkd, given on a regular grid of the unit cell without the endpoints, at
+    fractional k-points. The grid is treated as periodic by the interpolation itself, so any
+    k-point can be passed without wrapping it first.
 
-def plot_bands(s=None,sr=None,ks=None,convert=False,k_min=0,k_max=1,k_endpoint=True,ylim=(-0.2,0.2),Xkd=None,berry=False):
+    order=1 is trilinear interpolation and uses Xkd as is, higher orders use periodic splines
+    whose coefficients are computed once here.
+    """
+
+    def __init__(self, Xkd, order=1):
+        self.shape = np.array(Xkd.shape)
+        self.order = order
+        if order > 1:
+            self.coeffs = ndimage.spline_filter(Xkd, order=order, mode='grid-wrap')
+        else:
+            self.coeffs = Xkd
+
+    def __call__(self, ks):
+        ks = np.asarray(ks, dtype=float)
+        coords = (ks.reshape(-1, 3) * self.shape).T
+        values = ndimage.map_coordinates(self.coeffs, coords, order=self.order, mode='grid-wrap',
+                                         prefilter=False)
+        return values.reshape(ks.shape[:-1])
+
+def get_interpolator(Xkd,order=1):
+    return PeriodicInterpolator(Xkd,order)
+
+# Results of get_bands by the id of the Hamiltonian, the k-points and the options of get_Eks
+band_cache = OrderedDict()
+band_cache_size = 16
+
+# The Hamiltonian evaluated by the workers of get_bands, they inherit it when forked so that it
+# does not have to be pickled
+band_hamiltonian = None
+
+def get_Eks_chunk(ks,kwargs):
+    return get_Eks(band_hamiltonian,ks,**kwargs)
+
+def join_chunks(parts):
+    if isinstance(parts[0],tuple):
+        return tuple(np.concatenate(p,axis=0) for p in zip(*parts))
+    return np.concatenate(parts,axis=0)
+
+def get_bands(s,ks,n_workers=None,**kwargs):
+    """
+    get_Eks(s,ks,**kwargs) with the last band_cache_size results kept, so repeated plots of the
+    same path are not recomputed. The results are shared, they should not be modified.
+
+    With n_workers the k-points are split into chunks evaluated by a pool of forked processes.
+    """
+    global band_hamiltonian
+
+    ks_a = np.ascontiguousarray(ks,dtype=float)
+    key = (id(s),ks_a.shape,hashlib.sha1(ks_a.tobytes()).hexdigest(),tuple(sorted(kwargs.items())))
+    cached = band_cache.get(key)
+    if cached is not None and cached[0] is s:
+        band_cache.move_to_end(key)
+        return cached[1]
+
+    if n_workers is None or n_workers <= 1 or len(ks_a) < 2*n_workers:
+        result = get_Eks(s,ks,**kwargs)
+    else:
+        band_hamiltonian = s
+        chunks = np.array_split(ks_a,4*n_workers)
+        try:
+            with ProcessPoolExecutor(n_workers,mp_context=multiprocessing.get_context('fork')) as executor:
+                result = join_chunks(list(executor.map(get_Eks_chunk,chunks,[kwargs]*len(chunks))))
+        finally:
+            band_hamiltonian = None
+
+    band_cache[key] = (s,result)
+    if len(band_cache) > band_cache_size:
+        band_cache.popitem(last=False)
+    return result
+
+def plot_bands(s=None,sr=None,ks=None,convert=False,k_min=0,k_max=1,k_endpoint=True,ylim=(-0.2,0.2),Xkd=None,berry=False,
+               n_workers=None):
 
     if ks is None:
         raise Exception('ks must be specified')
 
     if convert:
         T = get_conv2prim_T(sr)
-        ks_c = []
-        for k in ks:
-            k2 = np.dot(T,k)
-            k2_1 = [x % 1 for x in k2]
-            ks_c.append(k2_1)
-                    
-        ks = ks_c
+        ks = np.dot(ks,np.transpose(T)) % 1
 
     if s is not None:
-        Eks0 = get_Eks(s,ks,ms=0)
-        Eks1 = get_Eks(s,ks,ms=1)
+        Eks0 = get_bands(s,ks,n_workers,ms=0)
+        Eks1 = get_bands(s,ks,n_workers,ms=1)
 
     if sr is not None:
         if not berry:
-            Eksr = get_Eks(sr,ks)
+            Eksr = get_bands(sr,ks,n_workers)
         else:
-            Eksr,bcs = get_Eks(sr,ks,berry=True)
+            Eksr,bcs = get_bands(sr,ks,n_workers,berry=True)
 
-            bcf = np.zeros(bcs.shape)
-            for i in range(bcs.shape[0]):
-                for j in range(bcs.shape[2]):
-                    if Eksr[i,j] < 0:
-                        bcf[i,:,j] = bcs[i,:,j]
-                    else:
-                        bcf[i,:,j] = 0
+            # Berry curvature of the occupied bands only
+            bcf = np.where(Eksr[:,None,:] < 0,bcs,0)
 
     nk = len(ks)
 
@@ -260,38 +528,40 @@ def plot_bands(s=None,sr=None,ks=None,convert=False,k_min=0,k_max=1,k_endpoint=T
         bcf_tot = np.sum(bcf,axis=2)
         plt.plot(np.linspace(k_min,k_max,nk,endpoint=k_endpoint),bcf_tot[:,2])
 
+# The reciprocal cells of the slabify objects with their factorization, by the id of the object
+k_frames = {}
+
+def get_k_frame(s):
+    frame = k_frames.get(id(s))
+    if frame is None or frame[0] is not s:
+        Rcell = s.hamdataRCell()*s.kscale
+        frame = (s,Rcell,lu_factor(Rcell))
+        if len(k_frames) >= 32:
+            k_frames.clear()
+        k_frames[id(s)] = frame
+    return frame[1],frame[2]
+
 def relk_to_fplok(s,k):
-    Rcell = s.hamdataRCell()*s.kscale
-    b1 = Rcell[:,0]
-    b2 = Rcell[:,1]
-    b3 = Rcell[:,2]
-    return b1 * k[0] + b2 * k[1] +b3 * k[2]
+    """ Converts the relative k-point k (or k-points, m x 3) to the fplo cartesian coordinates """
+    Rcell,lu = get_k_frame(s)
+    return np.dot(k,np.transpose(Rcell))
 
 def fplok_to_relk(s,k):
-    Rcell = s.hamdataRCell()*s.kscale
-    return np.linalg.solve(Rcell,k)
+    """ Converts the fplo cartesian k-point k (or k-points, m x 3) to relative coordinates """
+    Rcell,lu = get_k_frame(s)
+    return lu_solve(lu,np.transpose(k)).T
 
 
 
-def transform_Xkd(T,Xkd,nk):
-       
-    intp = get_interpolator(Xkd)
-    
-    Xkdt = np.zeros((nk,nk,nk))
-    
-    kpts = np.zeros((nk,nk,nk,3))
-    
-    for i,ki in enumerate(np.linspace(0,1,nk,endpoint=False)):
-        for j,kj in enumerate(np.linspace(0,1,nk,endpoint=False)):
-            for l,kl in enumerate(np.linspace(0,1,nk,endpoint=False)):
-                k1 = [ki,kj,kl]
-                k2 = np.dot(T,k1)
-                k2_1 = [x % 1 for x in k2]
-                kpts[i,j,l,:] = k2_1
-                
-    return intp(kpts)
+def transform_Xkd(T,Xkd,nk,order=1):
+    """ Resamples Xkd to an nk^3 grid in the basis transformed by T, with the order of get_interpolator """
 
+    intp = get_interpolator(Xkd,order)
 
+    ks = np.arange(nk)/nk
+    kpts = np.empty((nk,nk,nk,3))
+    kpts[...,0] = ks[:,None,None]
+    kpts[...,1] = ks[None,:,None]
+    kpts[...,2] = ks[None,None,:]
 
-        
-        
+    return intp(np.dot(kpts,np.transpose(T)))
@@ -588,16 +588,28 @@ def get_all_results(n=None):
     df = pd.DataFrame(data=df_dict)
     return df
 
-def get_gap(Xb):
+def get_gap(Xb,return_band=False,chunk_size=None):
+    """
+    The gap at E=0 for each k-point of the band energies Xb (nk1 x nk2 x nk3 x bands): the
+    energy difference of the first pair of neighbouring bands where the energy changes sign
+    from negative to positive, 0 if there is none. With return_band also returns the index
+    of the lower band of the pair, -1 if there is none.
+
+    With chunk_size Xb, which can be a memory map, is read in slabs of about chunk_size
+    k-points along the first axis.
+    """
     shape = Xb.shape
-    gaps = np.zeros((shape[0],shape[1],shape[2]))
-    for i in range(shape[0]):
-        for j in range(shape[1]):
-            for l in range(shape[2]):
-                for m,E in enumerate(Xb[i,j,l,:]):
-                    E1 = Xb[i,j,l,m+1]
-                    if E <0 and  E1 > 0:
-                        gaps[i,j,l] = E1 - E
-                        #print(m,E,E1)
-                        break
+    gaps = np.zeros(shape[:3])
+    bands = np.full(shape[:3],-1,dtype=int)
+    rows = shape[0] if chunk_size is None else max(chunk_size//(shape[1]*shape[2]),1)
+    for start in range(0,shape[0],rows):
+        Xb_c = np.asarray(Xb[start:start+rows])
+        crossing = (Xb_c[...,:-1] < 0) & (Xb_c[...,1:] > 0)
+        m = np.argmax(crossing,axis=-1)[...,None]
+        found = np.take_along_axis(crossing,m,axis=-1)[...,0]
+        gap = np.take_along_axis(Xb_c,m+1,axis=-1) - np.take_along_axis(Xb_c,m,axis=-1)
+        gaps[start:start+rows] = np.where(found,gap[...,0],0)
+        bands[start:start+rows] = np.where(found,m[...,0],-1)
+    if return_band:
+        return gaps,bands
     return gaps
@@ -0,0 +1,245 @@
+import os
+import json
+import glob
+import argparse
+from os import path
+
+import numpy as np
+import h5py
+import json_tricks
+from scipy.interpolate import RegularGridInterpolator
+
+bundle_name = 'bundle.hdf5'
+manifest_name = 'manifest.json'
+data_root = 'nodal_lines/data'
+
+# The bundles only feed the figures, single precision is plenty for that.
+dtype = 'f4'
+
+def material_dir(name):
+    return path.join(data_root, name)
+
+def list_materials():
+    """ Names of the materials with a manifest, only the directory entries are read """
+    return sorted(e.name for e in os.scandir(data_root)
+                  if e.is_dir() and path.isfile(path.join(e.path, manifest_name)))
+
+def load_manifest(name):
+    with open(path.join(material_dir(name), manifest_name)) as f:
+        return json.load(f)
+
+def bundle_file(data_dir):
+    return path.join(data_dir, bundle_name)
+
+def grid_axes(kpts):
+    """
+    Returns the axes of the regular grid of the k-points, with the first axis varying slowest,
+    or None if the k-points do not form such a grid.
+    """
+    axes = [np.unique(kpts[:, i]) for i in range(3)]
+    shape = tuple(len(a) for a in axes)
+    if np.prod(shape) != len(kpts):
+        return None
+    axes = [np.linspace(a[0], a[-1], len(a)) for a in axes]
+    grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+    if not np.allclose(grid, kpts, rtol=0, atol=1e-12):
+        return None
+    return axes
+
+def volume_pyramid(axes, values, min_points=8):
+    """
+    Levels of detail of a volume on a regular grid, from the finest to the coarsest.
+
+    The finest level refines the grid by two with linear interpolation, the next is the grid
+    itself and each further level halves it until an axis would have fewer than min_points
+    points. The levels hold absolute values, the coarse ones keep the maximum of each 2x2x2
+    block so that the hotspots do not fade out. Returns a list of (axes, values).
+    """
+    values = np.abs(values)
+    fine_axes = [np.linspace(a[0], a[-1], 2 * len(a) - 1) for a in axes]
+    intp = RegularGridInterpolator(axes, values)
+    levels = [(fine_axes, intp(np.stack(np.meshgrid(*fine_axes, indexing='ij'), axis=-1))),
+              (axes, values)]
+    while min(len(a) for a in axes) // 2 >= min_points:
+        m = [len(a) // 2 for a in axes]
+        values = values[:2 * m[0], :2 * m[1], :2 * m[2]].reshape(m[0], 2, m[1], 2, m[2], 2)
+        values = values.max(axis=(1, 3, 5))
+        axes = [(a[0:2 * n:2] + a[1:2 * n:2]) / 2 for a, n in zip(axes, m)]
+        levels.append((axes, values))
+    return levels
+
+def write_volume(group, kpts, Xkdi, ran):
+    group.attrs['kind'] = 'volume'
+    axes = grid_axes(kpts)
+    if axes is None:
+        group.create_dataset('kpts', data=kpts.astype(dtype))
+        group.create_dataset('values', data=Xkdi.astype(dtype))
+    else:
+        shape = tuple(len(a) for a in axes)
+        group.attrs['start'] = [a[0] for a in axes]
+        group.attrs['stop'] = [a[-1] for a in axes]
+        group.create_dataset('values', data=Xkdi.reshape(shape).astype(dtype))
+        levels = group.create_group('levels')
+        for i, (level_axes, values) in enumerate(volume_pyramid(axes, Xkdi.reshape(shape))):
+            dset = levels.create_dataset(str(i), data=values.astype(dtype))
+            dset.attrs['start'] = [a[0] for a in level_axes]
+            dset.attrs['stop'] = [a[-1] for a in level_axes]
+    if ran is not None:
+        group.attrs['ran'] = np.array(ran, dtype=float)
+
+def write_plane(group, Xkd_p, crossing_ks_p):
+    group.attrs['kind'] = 'plane'
+    group.create_dataset('values', data=Xkd_p.astype(dtype))
+    if crossing_ks_p is not None:
+        offsets = np.cumsum([0] + [len(c) for c in crossing_ks_p])
+        crossings = np.zeros((offsets[-1], 2), dtype=dtype)
+        for i, c in enumerate(crossing_ks_p):
+            crossings[offsets[i]:offsets[i + 1]] = c
+        group.create_dataset('crossings', data=crossings)
+        group.create_dataset('crossing_offsets', data=offsets)
+
+def write_bands(group, bands_data):
+    group.attrs['kind'] = 'bands'
+    for key, value in bands_data.items():
+        if isinstance(value, np.ndarray):
+            group.create_dataset(key, data=value.astype(dtype))
+        else:
+            group.attrs[key] = value
+
+def convert_material(data_dir):
+    """
+    Pack the json files of one material into data_dir/bundle.hdf5, one group per file.
+
+    Volumes on a regular grid are stored as an array of the grid shape together with the first
+    and last point of each axis, the k-points are not stored. Their levels of detail are stored
+    in the same way. The planes keep the crossing points of all bands in one dataset with the
+    offsets of the bands. All datasets are uncompressed and contiguous.
+    """
+    fname = bundle_file(data_dir)
+    tmp_fname = fname + '.tmp'
+    with h5py.File(tmp_fname, 'w') as f:
+        for json_file in sorted(glob.glob(path.join(data_dir, '*.json'))):
+            if path.basename(json_file) == manifest_name:
+                continue
+            with open(json_file) as jf:
+                inp = json_tricks.load(jf)
+            group = f.create_group(path.basename(json_file)[:-5])
+            if isinstance(inp, dict) and 'Xkdi' in inp:
+                write_volume(group, inp['kpts'], inp['Xkdi'], inp.get('ran'))
+            elif isinstance(inp, dict):
+                write_bands(group, inp)
+            elif inp[0].ndim == 2 and inp[0].shape[1] == 3 and inp[1].ndim == 1:
+                write_volume(group, inp[0], inp[1], None)
+            else:
+                write_plane(group, inp[0], inp[1])
+    os.replace(tmp_fname, fname)
+
+def open_group(fname):
+    """
+    Returns the open bundle and the name of the group holding the data of the json file fname,
+    or None if there is no bundle for it or the json file has been modified since.
+    """
+    data_dir, base = path.split(fname)
+    bundle = bundle_file(data_dir)
+    if not path.isfile(bundle):
+        return None
+    if path.isfile(fname) and path.getmtime(fname) > path.getmtime(bundle):
+        return None
+    f = h5py.File(bundle, 'r')
+    name = base[:-5] if base.endswith('.json') else base
+    if name not in f:
+        f.close()
+        return None
+    return f, name
+
+def load_volume(fname):
+    """ Returns the k-points, the values and the plot range (or None) of a 3D volume """
+    opened = open_group(fname)
+    if opened is None:
+        with open(fname, 'r') as f:
+            inp = json_tricks.load(f)
+        if isinstance(inp, dict):
+            return inp['kpts'], inp['Xkdi'], inp['ran']
+        return inp[0], inp[1], None
+
+    f, name = opened
+    with f:
+        group = f[name]
+        values = group['values'][()]
+        if 'kpts' in group:
+            kpts = group['kpts'][()]
+        else:
+            axes = [np.linspace(a, b, n) for a, b, n in
+                    zip(group.attrs['start'], group.attrs['stop'], values.shape)]
+            kpts = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        ran = group.attrs['ran'].tolist() if 'ran' in group.attrs else None
+    return kpts, values.ravel(), ran
+
+def load_volume_levels(fname):
+    """
+    Returns the levels of detail of a 3D volume as computed by volume_pyramid and the plot
+    range (or None). The levels are None if the volume is not on a regular grid.
+    """
+    opened = open_group(fname)
+    if opened is not None:
+        f, name = opened
+        with f:
+            group = f[name]
+            if 'levels' in group:
+                levels = []
+                for i in range(len(group['levels'])):
+                    dset = group['levels'][str(i)]
+                    values = dset[()]
+                    axes = [np.linspace(a, b, n) for a, b, n in
+                            zip(dset.attrs['start'], dset.attrs['stop'], values.shape)]
+                    levels.append((axes, values))
+                ran = group.attrs['ran'].tolist() if 'ran' in group.attrs else None
+                return levels, ran
+
+    kpts, Xkdi, ran = load_volume(fname)
+    axes = grid_axes(kpts)
+    if axes is None:
+        return None, ran
+    return volume_pyramid(axes, Xkdi.reshape([len(a) for a in axes])), ran
+
+def load_plane(fname):
+    """ Returns the values in the plane and the list of crossing points of each band (or None) """
+    opened = open_group(fname)
+    if opened is None:
+        with open(fname) as f:
+            Xkd_p, crossing_ks_p = json_tricks.load(f)
+        return Xkd_p, crossing_ks_p
+
+    f, name = opened
+    with f:
+        group = f[name]
+        Xkd_p = group['values'][()]
+        if 'crossings' not in group:
+            return Xkd_p, None
+        crossings = group['crossings'][()]
+        offsets = group['crossing_offsets'][()]
+    return Xkd_p, [crossings[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+def load_bands(fname):
+    """ Returns the dictionary with the bands and Berry curvature along a line """
+    opened = open_group(fname)
+    if opened is None:
+        with open(fname) as f:
+            return json_tricks.load(f)
+
+    f, name = opened
+    with f:
+        group = f[name]
+        bands_data = {key: group[key][()] for key in group}
+        for key, value in group.attrs.items():
+            if key != 'kind':
+                bands_data[key] = value.tolist()
+    return bands_data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack the nodal-line json files of each material into a bundle.')
+    parser.add_argument('data_dirs', nargs='*')
+    args = parser.parse_args()
+    data_dirs = args.data_dirs or sorted(d for d in glob.glob(path.join(data_root, '*')) if path.isdir(d))
+    for data_dir in data_dirs:
+        convert_material(data_dir)
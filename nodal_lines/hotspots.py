@@ -0,0 +1,158 @@
+import os
+import argparse
+from os import path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import h5py
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from nodal_lines.data_bundle import grid_axes,list_materials,load_manifest,material_dir,load_volume
+
+catalog_file = 'data/hotspots.hdf5'
+
+hotspot_dtype = np.dtype([('n_points', 'i4'), ('centroid', 'f8', 3), ('extent', 'f8', 3),
+                          ('peak', 'f8'), ('peak_k', 'f8', 3), ('sum', 'f8'), ('share', 'f8')])
+catalog_dtype = np.dtype([('material', 'S64')] + hotspot_dtype.descr)
+
+def label_regions(mask, periodic=True):
+    """
+    Labels the connected regions of mask (face neighbours). With periodic the regions touching
+    opposite faces of the grid are joined. Returns the labels, 0 outside, and their number.
+    """
+    labels, n = ndimage.label(mask)
+    if not periodic or n == 0:
+        return labels, n
+    a = np.concatenate([np.take(labels, 0, axis=i).ravel() for i in range(3)])
+    b = np.concatenate([np.take(labels, -1, axis=i).ravel() for i in range(3)])
+    joined = (a > 0) & (b > 0)
+    graph = coo_matrix((np.ones(np.count_nonzero(joined)), (a[joined], b[joined])), shape=(n + 1, n + 1))
+    _, component = connected_components(graph, directed=False)
+    _, new_labels = np.unique(component[1:], return_inverse=True)
+    relabel = np.concatenate([[0], new_labels + 1])
+    return relabel[labels], new_labels.max() + 1
+
+def find_hotspots(Xkd, threshold, axes=None):
+    """
+    Finds the hotspots of Xkd: the connected regions where |Xkd| >= threshold.
+
+    Without axes Xkd is taken on the periodic grid i/n of the unit cell, without the endpoints,
+    and the regions are joined across the cell boundary. With axes (the coordinates along each
+    axis) the grid is not periodic. For each region returns the number of points, the centroid
+    weighted by |Xkd|, the extent along each axis, the value and k-point of the largest |Xkd|,
+    the sum of Xkd and its share of the sum over the whole grid, which is the share of the
+    AHE. The hotspots are sorted by the share, largest first.
+    """
+    shape = Xkd.shape
+    labels, n = label_regions(np.abs(Xkd) >= threshold, periodic=axes is None)
+    if n == 0:
+        return np.zeros(0, dtype=hotspot_dtype)
+
+    idx = np.flatnonzero(labels)
+    lab = labels.ravel()[idx] - 1
+    values = Xkd.ravel()[idx]
+    weights = np.abs(values)
+    ijk = np.unravel_index(idx, shape)
+
+    hot = np.zeros(n, dtype=hotspot_dtype)
+    hot['n_points'] = np.bincount(lab, minlength=n)
+    hot['sum'] = np.bincount(lab, weights=values, minlength=n)
+    hot['share'] = hot['sum'] / np.sum(Xkd)
+
+    # The points ordered by region, with the largest |Xkd| of each region last
+    order = np.lexsort((weights, lab))
+    starts = np.concatenate([[0], np.cumsum(hot['n_points'])[:-1]])
+    peaks = order[starts + hot['n_points'] - 1]
+    hot['peak'] = values[peaks]
+
+    w_sum = np.bincount(lab, weights=weights, minlength=n)
+    for i in range(3):
+        if axes is None:
+            x = ijk[i] / shape[i]
+            step = 1 / shape[i]
+            angle = 2 * np.pi * x
+            c = np.arctan2(np.bincount(lab, weights=weights * np.sin(angle), minlength=n),
+                           np.bincount(lab, weights=weights * np.cos(angle), minlength=n))
+            c = (c / (2 * np.pi)) % 1
+            c[c >= 1] = 0
+            d = (x - c[lab] + 0.5) % 1 - 0.5
+        else:
+            x = np.asarray(axes[i])[ijk[i]]
+            step = axes[i][1] - axes[i][0]
+            c = np.bincount(lab, weights=weights * x, minlength=n) / w_sum
+            d = x - c[lab]
+        d = d[order]
+        extent = np.maximum.reduceat(d, starts) - np.minimum.reduceat(d, starts) + step
+        hot['centroid'][:, i] = c
+        hot['extent'][:, i] = np.minimum(extent, 1) if axes is None else extent
+        hot['peak_k'][:, i] = x[peaks]
+
+    return hot[np.argsort(-hot['share'], kind='stable')]
+
+def is_periodic_axis(a):
+    n = len(a)
+    return np.isclose(a[0], 0) and np.isclose(a[-1], (n - 1) / n)
+
+def material_hotspots(name):
+    """ The hotspots of the 3D volume of a material, above the isomin of its page """
+    volume = load_manifest(name)['volume']
+    kpts, values, ran = load_volume(path.join(material_dir(name), volume['file']))
+    axes = grid_axes(kpts)
+    if axes is None:
+        return name, np.zeros(0, dtype=hotspot_dtype)
+    Xkd = values.reshape([len(a) for a in axes])
+    if all(is_periodic_axis(a) for a in axes):
+        axes = None
+    return name, find_hotspots(Xkd, volume['isomin'], axes)
+
+def build_catalog(fname=catalog_file, names=None, n_workers=None):
+    """
+    Finds the hotspots of all materials in parallel and writes them into one table, sorted by
+    the share of the AHE, largest first.
+    """
+    if names is None:
+        names = list_materials()
+    tables = []
+    with ProcessPoolExecutor(n_workers) as executor:
+        for name, hot in executor.map(material_hotspots, names):
+            table = np.zeros(len(hot), dtype=catalog_dtype)
+            table['material'] = name
+            for field in hotspot_dtype.names:
+                table[field] = hot[field]
+            tables.append(table)
+    table = np.concatenate(tables) if tables else np.zeros(0, dtype=catalog_dtype)
+    table = table[np.argsort(-table['share'], kind='stable')]
+
+    tmp_fname = fname + '.tmp'
+    with h5py.File(tmp_fname, 'w') as f:
+        f.create_dataset('hotspots', data=table)
+    os.replace(tmp_fname, fname)
+
+class HotspotCatalog:
+    """
+    Queries of the hotspot catalog. The table is small and read once, it is kept sorted by the
+    share of the AHE so that the hotspots above a share are a prefix of it. The catalog is built
+    with the image (see the Dockerfile) for offline analysis, the pages do not read it.
+    """
+
+    def __init__(self, fname=catalog_file):
+        with h5py.File(fname, 'r') as f:
+            self.table = f['hotspots'][()]
+
+    def query(self, min_share=None, material=None):
+        table = self.table
+        if min_share is not None:
+            table = table[:np.searchsorted(-table['share'], -min_share, side='right')]
+        if material is not None:
+            table = table[table['material'] == material.encode()]
+        return table
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the catalog of the Berry curvature hotspots of the nodal-line materials.')
+    parser.add_argument('materials', nargs='*')
+    parser.add_argument('--output', default=catalog_file)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    build_catalog(args.output, args.materials or None, args.workers)
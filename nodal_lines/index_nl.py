@@ -9,12 +9,14 @@ import numpy as np
 import json_tricks
 import dash_bootstrap_components as dbc
 
+import os
 from os import sys, path
+from collections import OrderedDict
 sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
 from app import app
 from common import Navbar
 
-from .materials import Eu2SeO2,GdTmRh2,U2PN2,Ni,MnCoPt2,CeTe2
+from . import material_page
 from .utils import Header
 #from plotly.express.colors.qualitative import vivid
 
@@ -37,23 +39,38 @@ def create_layout():
     layout = dbc.Container([Navbar(),Header(app), html.Div(id="material-content")])
     return layout
 
+# The last layout_cache_size layouts of the materials built in this worker, with the modification
+# times of their data files. The layouts do not depend on the request, so they are only rebuilt
+# when the data change or after they were evicted; each takes several MB.
+layouts = OrderedDict()
+layout_cache_size = int(os.environ.get('NODAL_LINES_LAYOUT_CACHE', 8))
+
+def data_mtime(data_dir):
+    return tuple(sorted((f.name, f.stat().st_mtime_ns) for f in os.scandir(data_dir) if f.is_file()))
+
+def get_material_layout(name):
+    mtime = data_mtime(material_page.material_dir(name))
+    if name in layouts and layouts[name][0] == mtime:
+        layouts.move_to_end(name)
+        return layouts[name][1]
+    layout = material_page.create_layout(name)
+    layouts[name] = (mtime, layout)
+    layouts.move_to_end(name)
+    while len(layouts) > layout_cache_size:
+        layouts.popitem(last=False)
+    return layout
+
+def prebuild_layouts(n):
+    """ Builds the layouts of the first n materials, at most as many as the cache holds """
+    for name in material_page.list_materials()[:min(n, layout_cache_size)]:
+        get_material_layout(name)
+
 @app.callback(dash.dependencies.Output("material-content","children"),
         [dash.dependencies.Input('materials-selection','value')])
 def update(value):
-    if value == 'Eu2SeO2':
-        return Eu2SeO2.create_layout()
-    elif value == 'GdTmRh2':
-        return GdTmRh2.create_layout()
-    elif value == 'U2PN2':
-        return U2PN2.create_layout()
-    elif value == 'Ni':
-        return Ni.create_layout()
-    elif value == 'MnCoPt2':
-        return MnCoPt2.create_layout()
-    elif value == 'CeTe2':
-        return CeTe2.create_layout()
+    if value in material_page.list_materials():
+        return get_material_layout(value)
     else:
         print('nevim')
 
-#Eu2SeO2.create_layout(app)
-
+prebuild_layouts(int(os.environ.get('NODAL_LINES_PREBUILD', 0)))
@@ -0,0 +1,137 @@
+from os import path
+
+from dash import dcc
+from dash import html
+from dash.dependencies import Input, Output, State, MATCH, ClientsideFunction
+import dash_bootstrap_components as dbc
+import plotly.express as px
+
+from app import app
+from nodal_lines.data_bundle import material_dir,list_materials,load_manifest
+from interpolate import plotly_plane,add_plane,create_3d_plot,plot_bands,add_circle,add_line,volume_points,volume_points_high,has_high_res
+
+colors = px.colors.qualitative.G10
+
+def get_color(color):
+    """ Colors in the manifests are either indices to the G10 palette or plotly colors """
+    if isinstance(color, int):
+        return colors[color]
+    return color
+
+def plot_volume(name, manifest, high_res=False):
+    volume = manifest['volume']
+    max_points = volume_points_high if high_res else volume_points
+    fig3d = create_3d_plot(path.join(material_dir(name), volume['file']),isomin=volume['isomin'],
+                           isomax=volume['isomax'],surface_count=volume.get('surface_count',17),
+                           max_points=max_points)
+    for plane in volume.get('planes',[]):
+        add_plane(fig3d,plane['a1'],plane['a2'],shift=plane.get('shift'),color=get_color(plane['color']),
+                  opacity=volume.get('plane_opacity',0.3),name=plane['name'],visible='legendonly')
+    return fig3d
+
+def plot_plane(name, manifest, block):
+    fig = plotly_plane(path.join(material_dir(name), block['file']),bands=block.get('bands'),
+                       legendonlybands=block.get('legendonlybands'))
+    if 'title' in block:
+        fig.update_layout(title=block['title'])
+    for line in block.get('lines',[]):
+        add_line(fig,**line)
+    return fig
+
+def plot_line_bands(name, manifest, block):
+    fig = plot_bands(path.join(material_dir(name), block['file']),title=block.get('title'),
+                     ylim=block.get('ylim'),kscale=manifest.get('kscale'))
+    for circle in block.get('circles',[]):
+        circle = dict(circle)
+        if 'color' in circle:
+            circle['color'] = get_color(circle['color'])
+        add_circle(fig,**circle)
+    return fig
+
+def volume_section(name, manifest):
+    """ The 3D plot with its controls, all ids are matched by the material name """
+    children = []
+    volume = manifest['volume']
+    # The switch is only offered if it gives a finer plot
+    if volume.get('high_res',True) and has_high_res(path.join(material_dir(name), volume['file']),volume['isomin']):
+        children += [
+            # The switch is disabled through the fieldset while the figure is built
+            html.Fieldset(dbc.Checklist(options=[{'label' : 'High resolution plot', 'value' : 1}],
+                                        id={'type': 'nl-high-res', 'material': name},switch=True),
+                          id='nl-high-res-set'),
+            dbc.Progress(id='nl-progress',value=0,striped=True,animated=True,style={'visibility':'hidden'}),
+            dbc.Alert("""The high resolution plot shows the Berry curvature distribution more clearly,
+            but can be slow to load or even unstable!""", color="warning"),
+        ]
+    children += [
+        dbc.Button("Show mirror planes", outline=True, color="primary", className="mr-1",
+                   id={'type': 'nl-show-planes', 'material': name}),
+        dbc.Button("Hide mirror planes", outline=True, color="primary", className="mr-1",
+                   id={'type': 'nl-hide-planes', 'material': name}),
+        dbc.Alert("You can also show or hide individual planes by clicking on the legend.", color="info"),
+        dbc.Container(dcc.Graph(id={'type': 'nl-volume', 'material': name},
+                                figure=plot_volume(name, manifest))),
+    ]
+    return children
+
+def create_block(name, manifest, block):
+    kind = block['type']
+    if kind in ('h1', 'h2', 'h3'):
+        return [getattr(html, kind.upper())(block['text'])]
+    elif kind == 'p':
+        return [html.P(block['text'])]
+    elif kind == 'link':
+        return [dcc.Link(block['text'], href=block['href'])]
+    elif kind == 'spacer':
+        return [html.Div(style={'padding': block.get('padding', 10)})]
+    elif kind == 'volume':
+        return volume_section(name, manifest)
+    elif kind == 'plane':
+        return [dbc.Container(dcc.Graph(figure=plot_plane(name, manifest, block)))]
+    elif kind == 'bands':
+        return [dbc.Container(dcc.Graph(figure=plot_line_bands(name, manifest, block)))]
+    else:
+        raise Exception('Unknown block type {} in the manifest of {}'.format(kind, name))
+
+def create_layout(name):
+    """
+    Layout of the page of one material, built from nodal_lines/data/<name>/manifest.json.
+
+    The manifest gives the parameters of the 3D plot ('volume') and the list of blocks of the
+    page ('content'): headings, paragraphs, links, the 3D plot, planes with lines and band
+    plots with circles.
+    """
+    manifest = load_manifest(name)
+    children = []
+    for block in manifest['content']:
+        children += create_block(name, manifest, block)
+    return html.Div(children)
+
+app.clientside_callback(
+    ClientsideFunction(namespace='nodal_lines', function_name='show_hide_planes'),
+    Output({'type': 'nl-volume', 'material': MATCH},'figure', allow_duplicate=True),
+    Input({'type': 'nl-show-planes', 'material': MATCH},'n_clicks'),
+    Input({'type': 'nl-hide-planes', 'material': MATCH},'n_clicks'),
+    State({'type': 'nl-volume', 'material': MATCH},'figure'),
+    prevent_initial_call=True)
+
+@app.callback(
+    Output({'type': 'nl-volume', 'material': MATCH},'figure'),
+    Input({'type': 'nl-high-res', 'material': MATCH},'value'),
+    # The results are cached by the arguments, the id holds the name of the material
+    State({'type': 'nl-volume', 'material': MATCH},'id'),
+    background=True,
+    interval=250,
+    # Background callbacks do not support pattern-matching ids in the progress outputs, there is
+    # only one material on the page, so the progress bar has a plain id, as has the fieldset of the
+    # switch. The switch is disabled so that toggling it does not start more jobs.
+    running=[(Output('nl-high-res-set','disabled'),True,False),
+             (Output('nl-progress','style'),{'visibility':'visible'},{'visibility':'hidden'})],
+    progress=[Output('nl-progress','value'),Output('nl-progress','label')],
+    prevent_initial_call=True)
+def set_precision(set_progress,value,fig_id):
+    name = fig_id['material']
+    set_progress((30,'Building the figure'))
+    fig3d = plot_volume(name, load_manifest(name), high_res=bool(value))
+    set_progress((90,'Sending the figure'))
+    return fig3d
@@ -1,6 +1,8 @@
 from dash import html
 from dash import dcc
 
+from .material_page import list_materials
+
 
 def Header(app):
     return html.Div([get_header(app), html.Br([]), get_menu()])
@@ -23,14 +25,7 @@ def get_menu():
     menu = html.Div([
         dcc.Dropdown(
             id='materials-selection',
-            options=[
-                {'label':'Eu2SeO2','value': 'Eu2SeO2'},
-                {'label':'GdTmRh2','value': 'GdTmRh2'},
-                {'label':'U2PN2','value': 'U2PN2'},
-                {'label':'Ni','value': 'Ni'},
-                {'label':'MnCoPt2','value': 'MnCoPt2'},
-                {'label':'CeTe2','value': 'CeTe2'},
-                ],
+            options=[{'label': name, 'value': name} for name in list_materials()],
             value='CeTe2'
         )
         ])
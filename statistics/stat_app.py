@@ -11,8 +11,9 @@ from os import sys, path
 sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
 from app import app
 from common import Navbar, column_names, inv_column_names
+from database import load_summary
 
-df = pd.read_json('data/paper_database.json')
+df = load_summary()
 
 columns =  [
     'Total Magnetization',